@@ -4,6 +4,7 @@ import bpy
 import mathutils
 
 from ...Core.FileFormats.Geom.GeomInterface import GeomInterface
+from ...Core.FileFormats.Geom.GeomInterface.MatrixPalettes import MAX_MATRIX_PALETTE_SIZE
 from ...Core.FileFormats.Geom.GeomBinary.MeshBinary.Base import Vertex
 from ...Utilities.Hash import dscs_hash_string
 from ...Utilities.List import natural_sort
@@ -15,7 +16,6 @@ from ..IOHelpersLib.Meshes.VertexSplitting import get_uvs
 from ..IOHelpersLib.Meshes.VertexSplitting import get_colors
 from ..IOHelpersLib.Objects import find_bpy_objects
 from ..IOHelpersLib.ErrorLog import DisplayableVerticesError
-from ..IOHelpersLib.ErrorLog import DisplayableMeshesError
 
 
 class MissingVertexGroupsError(DisplayableVerticesError):
@@ -47,13 +47,6 @@ class PartiallyUnriggedMeshError(DisplayableVerticesError):
         return f"Mesh '{mesh.name}' has {len(vertex_indices)}/{len(mesh.data.vertices)} vertices that are unrigged."
 
 
-class TooManyVertexGroupsError(DisplayableMeshesError):
-    def __init__(self, bpy_mesh_obj, group_count):
-        msg = f"Mesh '{bpy_mesh_obj.name}' has {group_count} vertex groups with at least one vertex. A maximum of 54 vertex groups can be used per mesh. You should split this mesh such that each piece of the mesh contains less than 54 non-empty vertex groups."
-        super().__init__(msg, [bpy_mesh_obj])
-        
-
-
 def get_parent_info(obj):
     for constr in obj.constraints:
         if constr.type == "CHILD_OF":
@@ -63,7 +56,7 @@ def get_parent_info(obj):
     return (obj.parent, obj.parent_bone)
 
 
-def extract_meshes(gi, armature_obj, errorlog,  bone_names, material_names):
+def extract_meshes(gi, armature_obj, errorlog,  bone_names, material_names, use_triangle_strips=False, optimise_vertex_cache=False, merge_meshes=False):
     all_meshes = [obj for obj in armature_obj.children if obj.type == "MESH"]
     bpy_meshes = natural_sort([obj for obj in all_meshes if obj.data.DSCS_MeshProperties.mesh_type == "MESH"], lambda x: x.name)
     collider_meshes = [obj for obj in all_meshes if obj.data.DSCS_MeshProperties.mesh_type == "COLLIDER"]
@@ -107,8 +100,32 @@ def extract_meshes(gi, armature_obj, errorlog,  bone_names, material_names):
         vertices, indices, dscs_to_bpy_vert_map = extract_vertices(bpy_mesh_obj, errorlog, bone_names)
 
         unsigned_hash = struct.unpack('I', struct.pack('i', props.name_hash))[0]
-        m = gi.add_mesh(unsigned_hash, props.flags, material_idx, vertices, indices)
-        m.vertex_attributes = None  # Setting to 'None' will cause the attributes to be auto-calculated
+        m = gi.add_mesh(unsigned_hash, props.flags, material_idx, vertices, indices, use_triangle_strips)
+        
+        # Collapse vertices that ended up with identical exported data
+        vertex_count = len(m.vertices)
+        welded_count = m.weld_vertices()
+        if welded_count:
+            print(f"Welded {welded_count} duplicate vertices in '{bpy_mesh_obj.name}': {vertex_count} -> {vertex_count - welded_count} vertices")
+        
+        # Split meshes that reference too many bones for a single matrix palette
+        submeshes = m.partition_by_matrix_palette()
+        if len(submeshes) > 1:
+            gi.meshes[-1:] = submeshes
+            print(f"Split '{bpy_mesh_obj.name}' into {len(submeshes)} meshes to fit the {MAX_MATRIX_PALETTE_SIZE}-bone matrix palette limit")
+        
+        for m in submeshes:
+            if optimise_vertex_cache:
+                acmr_before, acmr_after = m.optimise_vertex_cache()
+                print(f"Optimised vertex cache for '{bpy_mesh_obj.name}': ACMR {acmr_before:.3f} -> {acmr_after:.3f}")
+            m.vertex_attributes = None  # Setting to 'None' will cause the attributes to be auto-calculated
+    
+    if merge_meshes:
+        mesh_count = len(gi.meshes)
+        gi.merge_meshes()
+        print(f"Merged {mesh_count} meshes into {len(gi.meshes)}")
+    
+    print(f"Exported geometry uses {len(gi.meshes)} draw calls")
 
 
 def extract_vertices(bpy_mesh_obj, errorlog, bone_names):
@@ -153,7 +170,6 @@ class VertexGetter:
         self.unrigged_verts         = []
         self.missing_bone_names     = []
         self.missing_weight_verts   = []
-        self.all_indices = set()
         
         self.log_missing_weights = (errorlog.missing_weights_policy == "STRIP")
         
@@ -188,7 +204,6 @@ class VertexGetter:
             else:
                 skin_indices[grp_idx] = grp_bone_idx
                 skin_weights[grp_idx] = grp.weight
-                self.all_indices.add(grp_bone_idx)
                 grp_idx += 1
                 
         if grp_idx:
@@ -238,10 +253,6 @@ class VertexGetter:
                 errorlog.log_error(err)
             else:
                 raise NotImplementedError(f"Unknown Missing Weights Policy option '{errorlog.missing_weights_policy}'")
-        
-        # Too many vertex groups
-        if len(self.all_indices) > 54:
-            errorlog.log_error(TooManyVertexGroupsError(bpy_mesh_obj, len(self.all_indices)))
 
 
 def make_vertex(vertex_data, loop_data):
@@ -675,11 +686,11 @@ def extract_IBPMs(gi, armature_obj):
         gi.ibpms.append([*bone_matrix[0], *bone_matrix[1], *bone_matrix[2]])
 
 
-def extract_geom(armature_obj, errorlog, bpy_to_dscs_bone_map, material_names):
+def extract_geom(armature_obj, errorlog, bpy_to_dscs_bone_map, material_names, use_triangle_strips=False, optimise_vertex_cache=False, merge_meshes=False):
     armature = armature_obj.data
     
     gi = GeomInterface()
-    extract_meshes(gi, armature_obj, errorlog, bpy_to_dscs_bone_map, material_names)
+    extract_meshes(gi, armature_obj, errorlog, bpy_to_dscs_bone_map, material_names, use_triangle_strips, optimise_vertex_cache, merge_meshes)
     texture_names      = extract_materials(gi, material_names)
     texture_extractors = extract_textures(gi, texture_names, errorlog)
     extract_cameras(gi, armature_obj, errorlog, bpy_to_dscs_bone_map)
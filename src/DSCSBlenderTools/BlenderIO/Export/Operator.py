@@ -37,6 +37,38 @@ class ExportMediaVision(bpy.types.Operator):
         default="ERROR"
     )
     
+    use_triangle_strips: bpy.props.BoolProperty(
+        name="Use Triangle Strips",
+        description="Export each mesh as a triangle strip if that needs fewer indices than a triangle list",
+        default=False
+    )
+    
+    optimise_vertex_cache: bpy.props.BoolProperty(
+        name="Optimise Vertex Cache",
+        description="Reorder the triangles and vertices of each mesh for better GPU vertex cache use",
+        default=False
+    )
+    
+    merge_meshes: bpy.props.BoolProperty(
+        name="Merge Meshes",
+        description="Merge meshes that share a material, flags and vertex layout into fewer draw calls, while keeping within the matrix palette limit. Merged meshes take the name of the first mesh merged into them",
+        default=False
+    )
+    
+    quantise_vertex_attributes: bpy.props.BoolProperty(
+        name="Quantise Vertex Attributes",
+        description="Store each vertex attribute of each mesh in the smallest format that stays within the Quantisation Tolerance",
+        default=False
+    )
+    
+    quantisation_tolerance: bpy.props.FloatProperty(
+        name="Quantisation Tolerance",
+        description="The largest error allowed in any vertex attribute value when quantising vertex attributes",
+        default=0.001,
+        min=0.,
+        precision=5
+    )
+    
     
     @ExportErrorLog.display_exceptions()
     def export_file(self, context):
@@ -69,7 +101,7 @@ class ExportMediaVision(bpy.types.Operator):
         
         
         # Extract geometry and names
-        gi, image_extractors = extract_geom(armature_obj, errorlog, bpy_to_dscs_bone_map, material_names)
+        gi, image_extractors = extract_geom(armature_obj, errorlog, bpy_to_dscs_bone_map, material_names, self.use_triangle_strips, self.optimise_vertex_cache, self.merge_meshes)
         ni        = extract_name(errorlog, bpy_to_dscs_bone_map, material_names)
         
         # Extract colliders
@@ -81,6 +113,9 @@ class ExportMediaVision(bpy.types.Operator):
         
         # If there were no errors, all this data should be guaranteed to be valid,
         # and therefore it should all successfully export
+        if self.quantise_vertex_attributes:
+            bytes_saved, max_errors = gi.quantise_vertex_attributes(self.model_type, self.quantisation_tolerance)
+            print(f"Quantised vertex attributes: saved {bytes_saved} bytes, maximum errors {', '.join(f'{name}: {error:.3g}' for name, error in max_errors.items())}")
         ni.to_file(os.path.splitext(self.filepath)[0] + ".name")
         si.to_file(os.path.splitext(self.filepath)[0] + ".skel")
         gi.to_file(os.path.splitext(self.filepath)[0] + ".geom", self.model_type, invalidate_self_allowed=True)
@@ -54,17 +54,18 @@ def import_meshes(collection, model_name, ni, gi, armature, material_list, error
         # PURE GEOMETRY #
         #################
         # First get the primitives
+        # Blender truth-tests the faces, so they must be lists rather than arrays
         if mesh.indices.primitive_type == PrimitiveTypes.TRIANGLES:
-            faces = mesh.indices.unpack()
+            faces = mesh.indices.unpack().tolist()
         elif mesh.indices.primitive_type == PrimitiveTypes.TRIANGLE_STRIP:
-            faces = mesh.indices.to_triangles().unpack()
+            faces = mesh.indices.to_triangles().unpack().tolist()
         else:
             errorlog.log_error_message(f"Primitive Type '{mesh.indices.primitive_type}', found on mesh {i}, is not supported")
 
         # Now merge model vertices into Blender vertices
-        vp = [v.position[:3] for v in mesh.vertices]
-        vi = [v.indices      for v in mesh.vertices]
-        vw = [v.weights      for v in mesh.vertices]
+        vp = [p[:3] for p in mesh.vertices.rows(AttributeTypes.POSITION)]
+        vi = mesh.vertices.rows(AttributeTypes.INDEX)
+        vw = mesh.vertices.rows(AttributeTypes.WEIGHT)
 
         ###############
         # CREATE MESH #
@@ -1,6 +1,6 @@
 import math
 
-from ...serialization.Serializable import Serializable
+from ...serialization.Serializable import Serializable, Field, FieldLayout
 
 
 class AnimBinary(Serializable):
@@ -38,6 +38,38 @@ class AnimBinary(Serializable):
     @property
     def STATIC_FLOAT_CHANNELS_OFFSET_OFFSET  (self): return 0x44
 
+    HEADER_LAYOUT = FieldLayout([
+        Field("filetype",                       's', 4, expected=b"40AE"),
+
+        Field("animation_duration",             'f'),
+        Field("playback_rate",                  'f'),
+        Field("animation_masks_offset",         'H'),
+        Field("bone_count",                     'H'),
+        Field("frame_count",                    'H'),
+        Field("keyframe_chunk_count",           'H'),
+        Field("always_0x4000",                  'H'),
+
+        Field("static_rotations_count",         'H'),
+        Field("static_locations_count",         'H'),
+        Field("static_scales_count",            'H'),
+        Field("static_float_channel_count",     'H'),
+        Field("animated_rotations_count",       'H'),
+        Field("animated_locations_count",       'H'),
+        Field("animated_scales_count",          'H'),
+        Field("animated_float_channel_count",   'H'),
+        Field("padding_0x26",                   'H'),
+
+        Field("animation_masks_size",           'I'),
+        Field("bone_mask_offset",               'I'),
+
+        Field("keyframe_chunks_offsets_offset", 'I', offset="KEYFRAME_CHUNKS_OFFSETS_OFFSET_OFFSET"),
+        Field("keyframe_chunks_counts_offset",  'I', offset="KEYFRAME_CHUNKS_COUNTS_OFFSET_OFFSET"),
+        Field("static_rotations_offset",        'I', offset="STATIC_ROTATIONS_OFFSET_OFFSET"),
+        Field("static_locations_offset",        'I', offset="STATIC_LOCATIONS_OFFSET_OFFSET"),
+        Field("static_scales_offset",           'I', offset="STATIC_SCALES_OFFSET_OFFSET"),
+        Field("static_float_channels_offset",   'I', offset="STATIC_FLOAT_CHANNELS_OFFSET_OFFSET"),
+    ])
+
     def __init__(self, skel_binary_ref):
         super().__init__()
 
@@ -92,7 +124,7 @@ class AnimBinary(Serializable):
         self.keyframe_chunks         = None
 
     def read_write(self, rw):
-        self.rw_header(rw)
+        rw.rw_deferred_obj_method(self, self.rw_header)
         self.rw_bone_idx_lists(rw)
         self.rw_static_rotations(rw)
         self.rw_static_locations(rw)
@@ -106,36 +138,7 @@ class AnimBinary(Serializable):
 
     def rw_header(self, rw):
         rw.assert_local_file_pointer_now_at("Start of File", 0)
-        self.filetype = rw.rw_bytestring(self.filetype, 4)
-        rw.assert_equal(self.filetype, b"40AE")
-
-        self.animation_duration     = rw.rw_float32(self.animation_duration)
-        self.playback_rate          = rw.rw_float32(self.playback_rate)
-        self.animation_masks_offset = rw.rw_uint16(self.animation_masks_offset)
-        self.bone_count             = rw.rw_uint16(self.bone_count)
-        self.frame_count            = rw.rw_uint16(self.frame_count)
-        self.keyframe_chunk_count   = rw.rw_uint16(self.keyframe_chunk_count)
-        self.always_0x4000          = rw.rw_uint16(self.always_0x4000)
-
-        self.static_rotations_count       = rw.rw_uint16(self.static_rotations_count)
-        self.static_locations_count       = rw.rw_uint16(self.static_locations_count)
-        self.static_scales_count          = rw.rw_uint16(self.static_scales_count)
-        self.static_float_channel_count   = rw.rw_uint16(self.static_float_channel_count)
-        self.animated_rotations_count     = rw.rw_uint16(self.animated_rotations_count)
-        self.animated_locations_count     = rw.rw_uint16(self.animated_locations_count)
-        self.animated_scales_count        = rw.rw_uint16(self.animated_scales_count)
-        self.animated_float_channel_count = rw.rw_uint16(self.animated_float_channel_count)
-        self.padding_0x26                 = rw.rw_uint16(self.padding_0x26)
-
-        self.animation_masks_size         = rw.rw_uint32(self.animation_masks_size)
-        self.bone_mask_offset             = rw.rw_uint32(self.bone_mask_offset)
-
-        self.keyframe_chunks_offsets_offset = rw.rw_offset_uint32(self.keyframe_chunks_offsets_offset, self.KEYFRAME_CHUNKS_OFFSETS_OFFSET_OFFSET)
-        self.keyframe_chunks_counts_offset  = rw.rw_offset_uint32(self.keyframe_chunks_counts_offset , self.KEYFRAME_CHUNKS_COUNTS_OFFSET_OFFSET)
-        self.static_rotations_offset        = rw.rw_offset_uint32(self.static_rotations_offset       , self.STATIC_ROTATIONS_OFFSET_OFFSET)
-        self.static_locations_offset        = rw.rw_offset_uint32(self.static_locations_offset       , self.STATIC_LOCATIONS_OFFSET_OFFSET)
-        self.static_scales_offset           = rw.rw_offset_uint32(self.static_scales_offset          , self.STATIC_SCALES_OFFSET_OFFSET)
-        self.static_float_channels_offset   = rw.rw_offset_uint32(self.static_float_channels_offset  , self.STATIC_FLOAT_CHANNELS_OFFSET_OFFSET)
+        rw.rw_layout(self, self.HEADER_LAYOUT)
 
         rw.align(0x48, 0x60)
 
@@ -161,23 +164,27 @@ class AnimBinary(Serializable):
         rw.align(rw.local_tell(), 0x10)
 
     def rw_static_rotations(self, rw):
+        self.static_rotations_offset = rw.tie_to_local_offset(self.static_rotations_offset)
         if self.static_rotations_offset:
             rw.assert_local_file_pointer_now_at("Static Rotations", self.static_rotations_offset)
             self.static_rotations = rw.rw_s3Quats(self.static_rotations, self.static_rotations_count)
             rw.align(rw.local_tell(), 0x10)
 
     def rw_static_locations(self, rw):
+        self.static_locations_offset = rw.tie_to_local_offset(self.static_locations_offset)
         if self.static_locations_offset:
             rw.assert_local_file_pointer_now_at("Static Locations", self.static_locations_offset)
             self.static_locations = rw.rw_float32s(self.static_locations, (self.static_locations_count, 3))
             rw.align(rw.local_tell(), 0x10)
 
     def rw_static_scales(self, rw):
+        self.static_scales_offset = rw.tie_to_local_offset(self.static_scales_offset)
         if self.static_scales_offset:
             rw.assert_local_file_pointer_now_at("Static Scales", self.static_scales_offset)
             self.static_scales = rw.rw_float32s(self.static_scales, (self.static_scales_count, 3))
 
     def rw_static_float_channels(self, rw):
+        self.static_float_channels_offset = rw.tie_to_local_offset(self.static_float_channels_offset)
         if self.static_float_channels_offset:
             rw.assert_local_file_pointer_now_at("Static Float Channels", self.static_float_channels_offset)
             self.static_float_channels = rw.rw_float32s(self.static_float_channels, self.static_float_channel_count)
@@ -187,12 +194,17 @@ class AnimBinary(Serializable):
         if rw.mode() == "read":
             self.keyframe_chunks = [KeyframeChunk() for _ in range(self.keyframe_chunk_count)]
 
+        self.keyframe_chunks_offsets_offset = rw.tie_to_local_offset(self.keyframe_chunks_offsets_offset)
         if self.keyframe_chunks_offsets_offset:
             rw.assert_local_file_pointer_now_at("Keyframe Chunk Offsets", self.keyframe_chunks_offsets_offset)
-            for kf in self.keyframe_chunks:
-                rw.rw_obj_method(kf, kf.rw_block_info)
+            rw.rw_deferred_obj_method(self, self.rw_keyframe_chunk_block_infos)
+
+    def rw_keyframe_chunk_block_infos(self, rw):
+        for kf in self.keyframe_chunks:
+            rw.rw_obj_method(kf, kf.rw_block_info)
 
     def rw_keyframe_chunk_counts(self, rw):
+        self.keyframe_chunks_counts_offset = rw.tie_to_local_offset(self.keyframe_chunks_counts_offset)
         if self.keyframe_chunks_counts_offset:
             rw.assert_local_file_pointer_now_at("Keyframe Chunk Counts", self.keyframe_chunks_counts_offset)
             for kf in self.keyframe_chunks:
@@ -200,21 +212,38 @@ class AnimBinary(Serializable):
             rw.align(rw.local_tell(), 0x10)
 
     def rw_animation_masks(self, rw):
+        self.animation_masks_offset = rw.tie_to_local_offset(self.animation_masks_offset)
+        # The masks may be ndarrays, which cannot be truth-tested
+        has_masks = (self.bone_masks is not None and len(self.bone_masks)) or \
+                    (self.float_channel_masks is not None and len(self.float_channel_masks))
+        self.bone_mask_offset       = rw.tie_to_local_offset(self.bone_mask_offset, has_masks)
         rw.assert_local_file_pointer_now_at("Animation Masks", self.animation_masks_offset)
         if self.bone_mask_offset:
             self.bone_masks = rw.rw_uint8s(self.bone_masks, self.bone_count)
             rw.align(rw.local_tell(), 4)
             self.float_channel_masks = rw.rw_uint8s(self.float_channel_masks, self.skel_binary_ref.float_channel_count)
             rw.align(rw.local_tell(), 0x10)
-        rw.assert_local_file_pointer_now_at("End of Animation Masks", self.animation_masks_offset + self.animation_masks_size)
+
+        masks_end = None if self.animation_masks_size is None else self.animation_masks_offset + self.animation_masks_size
+        masks_end = rw.tie_to_local_offset(masks_end)
+        self.animation_masks_size = masks_end - self.animation_masks_offset
+        rw.assert_local_file_pointer_now_at("End of Animation Masks", masks_end)
 
     def rw_keyframe_chunk_data(self, rw):
         keyframes_size = (self.animated_rotations_count + self.animated_locations_count + self.animated_scales_count + self.animated_float_channel_count) / 8
         for kf in self.keyframe_chunks:
-            kf.rw_data(rw, keyframes_size)
+            rw.rw_lazy_obj_method(kf, kf.rw_data, kf.DATA_ATTRIBUTES, keyframes_size)
 
 
 class KeyframeChunk(Serializable):
+    # Attributes filled in by rw_data, which may be parsed lazily
+    DATA_ATTRIBUTES = (
+        "frame_0_rotations_bytecount", "frame_0_locations_bytecount", "frame_0_scales_bytecount", "frame_0_float_channels_bytecount",
+        "keyframed_rotations_bytecount", "keyframed_locations_bytecount", "keyframed_scales_bytecount", "keyframed_float_channels_bytecount",
+        "frame_0_rotations", "frame_0_locations", "frame_0_scales", "frame_0_float_channels", "keyframes_in_use",
+        "keyframed_rotations", "keyframed_locations", "keyframed_scales", "keyframed_float_channels"
+    )
+
     def __init__(self):
         super().__init__()
 
@@ -254,6 +283,7 @@ class KeyframeChunk(Serializable):
         self.keyframe_count = rw.rw_uint16(self.keyframe_count)
 
     def rw_data(self, rw, keyframes_size):
+        self.offset = rw.tie_to_local_offset(self.offset)
         rw.assert_local_file_pointer_now_at("Keyframe Chunk Data", self.offset)
         self.frame_0_rotations_bytecount        = rw.rw_uint16(self.frame_0_rotations_bytecount)
         self.frame_0_locations_bytecount        = rw.rw_uint16(self.frame_0_locations_bytecount)
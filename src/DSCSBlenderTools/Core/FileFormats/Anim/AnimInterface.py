@@ -2,7 +2,7 @@ import itertools
 import math
 
 from .AnimBinary import AnimBinary, KeyframeChunk
-from ...serialization.BinaryTargets import OffsetTracker
+from ...serialization.utils import ndarray_to_list
 from ....Utilities.Bits import chunk_bitvector
 from ....Utilities.Math import roundup
 from ....Utilities.Interpolation import lerp_one, lerp, slerp
@@ -20,9 +20,9 @@ class AnimInterface:
         self.float_channels = {}
 
     @classmethod
-    def from_file(cls, path, sk):
+    def from_file(cls, path, sk, validation="strict"):
         binary = AnimBinary(sk)
-        binary.read(path)
+        binary.read(path, validation=validation)
 
         return cls.from_binary(binary)
 
@@ -42,26 +42,32 @@ class AnimInterface:
             instance.float_channels[idx] = {}
 
         # Get the bits that are constant throughout the animation
-        for bone_idx, rotation in zip(binary.static_rotation_idxs, binary.static_rotations):
+        for bone_idx, rotation in zip(ndarray_to_list(binary.static_rotation_idxs), ndarray_to_list(binary.static_rotations)):
             instance.rotations[bone_idx][0] = rotation
-        for bone_idx, location in zip(binary.static_location_idxs, binary.static_locations):
+        for bone_idx, location in zip(ndarray_to_list(binary.static_location_idxs), ndarray_to_list(binary.static_locations)):
             instance.locations[bone_idx][0] = location
-        for bone_idx, scale in zip(binary.static_scale_idxs, binary.static_scales):
+        for bone_idx, scale in zip(ndarray_to_list(binary.static_scale_idxs), ndarray_to_list(binary.static_scales)):
             instance.scales[bone_idx][0] = scale
-        for channel_idx, channel_data in zip(binary.static_float_channel_idxs, binary.static_float_channels):
+        for channel_idx, channel_data in zip(ndarray_to_list(binary.static_float_channel_idxs), ndarray_to_list(binary.static_float_channels)):
             instance.float_channels[channel_idx][0] = channel_data
 
+        # Arrays read in ndarray mode are converted back to the values read otherwise
+        animated_rotation_idxs      = ndarray_to_list(binary.animated_rotation_idxs)
+        animated_location_idxs      = ndarray_to_list(binary.animated_location_idxs)
+        animated_scale_idxs         = ndarray_to_list(binary.animated_scale_idxs)
+        animated_float_channel_idxs = ndarray_to_list(binary.animated_float_channel_idxs)
+
         # Now add in the rotations, locations, and scales that change throughout the animation
         for keyframe_chunk in binary.keyframe_chunks:
             # Each keyframe chunk begins with a single frame
             current_frame = keyframe_chunk.keyframe_start
-            for bone_idx, value in zip(binary.animated_rotation_idxs, keyframe_chunk.frame_0_rotations):
+            for bone_idx, value in zip(animated_rotation_idxs, ndarray_to_list(keyframe_chunk.frame_0_rotations)):
                 instance.rotations[bone_idx][current_frame] = value
-            for bone_idx, value in zip(binary.animated_location_idxs, keyframe_chunk.frame_0_locations):
+            for bone_idx, value in zip(animated_location_idxs, ndarray_to_list(keyframe_chunk.frame_0_locations)):
                 instance.locations[bone_idx][current_frame] = value
-            for bone_idx, value in zip(binary.animated_scale_idxs, keyframe_chunk.frame_0_scales):
+            for bone_idx, value in zip(animated_scale_idxs, ndarray_to_list(keyframe_chunk.frame_0_scales)):
                 instance.scales[bone_idx][current_frame] = value
-            for channel_idx, value in zip(binary.animated_float_channel_idxs, keyframe_chunk.frame_0_float_channels):
+            for channel_idx, value in zip(animated_float_channel_idxs, ndarray_to_list(keyframe_chunk.frame_0_float_channels)):
                 instance.float_channels[channel_idx][current_frame] = value
 
             # The keyframe rotations, locations, etc. for all bones are all concatenated together into one big list
@@ -74,14 +80,14 @@ class AnimInterface:
             # file.
             nframes = keyframe_chunk.keyframe_count
             if nframes != 0:
-                keyframe_indices = chunk_bitvector(keyframe_chunk.keyframes_in_use, nframes)
+                keyframe_indices = chunk_bitvector(ndarray_to_list(keyframe_chunk.keyframes_in_use), nframes)
             else:
                 keyframe_indices = []
 
-            rotations      = iter(keyframe_chunk.keyframed_rotations)
-            locations      = iter(keyframe_chunk.keyframed_locations)
-            scales         = iter(keyframe_chunk.keyframed_scales)
-            float_channels = iter(keyframe_chunk.keyframed_float_channels)
+            rotations      = iter(ndarray_to_list(keyframe_chunk.keyframed_rotations))
+            locations      = iter(ndarray_to_list(keyframe_chunk.keyframed_locations))
+            scales         = iter(ndarray_to_list(keyframe_chunk.keyframed_scales))
+            float_channels = iter(ndarray_to_list(keyframe_chunk.keyframed_float_channels))
 
             # The benefit of doing this is that generators behave like a Queue. We can pop the next element off these
             # generators and never have to worry about keeping track of the state of each generator, because the
@@ -107,25 +113,25 @@ class AnimInterface:
             # The next index chunk we grab should then correspond to location data, so we move onto the next for-loop
             # below, and so on for the scale data.
             # Rotations
-            for bone_idx, indices in zip(binary.animated_rotation_idxs, keyframe_indices):
+            for bone_idx, indices in zip(animated_rotation_idxs, keyframe_indices):
                 frame_indices = [j + current_frame + 1 for j, elem in enumerate(indices) if elem == 1]
                 values = itertools.islice(rotations, len(frame_indices))  # Pop the next num_frames rotations
                 for frame, value in zip(frame_indices, values):
                     instance.rotations[bone_idx][frame] = value
             # Locations
-            for bone_idx, indices in zip(binary.animated_location_idxs, keyframe_indices):
+            for bone_idx, indices in zip(animated_location_idxs, keyframe_indices):
                 frame_indices = [j + current_frame + 1 for j, elem in enumerate(indices) if elem == 1]
                 values = itertools.islice(locations, len(frame_indices))  # Pop the next num_frames locations
                 for frame, value in zip(frame_indices, values):
                     instance.locations[bone_idx][frame] = value
             # Scales
-            for bone_idx, indices in zip(binary.animated_scale_idxs, keyframe_indices):
+            for bone_idx, indices in zip(animated_scale_idxs, keyframe_indices):
                 frame_indices = [j + current_frame + 1 for j, elem in enumerate(indices) if elem == 1]
                 values = itertools.islice(scales, len(frame_indices))  # Pop the next num_frames scales
                 for frame, value in zip(frame_indices, values):
                     instance.scales[bone_idx][frame] = value
             # Float channels
-            for channel_idx, indices in zip(binary.animated_float_channel_idxs, keyframe_indices):
+            for channel_idx, indices in zip(animated_float_channel_idxs, keyframe_indices):
                 frame_indices = [j + current_frame + 1 for j, elem in enumerate(indices) if elem == 1]
                 values = itertools.islice(float_channels, len(frame_indices))  # Pop the next num_frames float channel data
                 for frame, value in zip(frame_indices, values):
@@ -213,7 +219,7 @@ class AnimInterface:
         binary.animated_scales_count        = len(anim_scls)
         binary.animated_float_channel_count = len(anim_fchs)
         binary.padding_0x26 = 0
-        binary.animation_masks_size = 0  # Calculate later
+        binary.animation_masks_size = None  # Calculated when written
 
         # Fill in section 1: Bone indices used by the relevant data sections
         binary.static_rotation_idxs        = list(static_rots.keys())
@@ -289,31 +295,6 @@ class AnimInterface:
             kf_chunk.keyframed_scales = flatten_list(chunk.later_scales)
             kf_chunk.keyframed_float_channels = flatten_list(chunk.later_uvcs)
 
-        # Do offsets
-        ot = OffsetTracker()
-        ot.rw_obj_method(binary, binary.rw_header)
-        ot.rw_obj_method(binary, binary.rw_bone_idx_lists)
-        binary.static_rotations_offset = ot.tell()
-        ot.rw_obj_method(binary, binary.rw_static_rotations)
-        binary.static_locations_offset = ot.tell()
-        ot.rw_obj_method(binary, binary.rw_static_locations)
-        binary.static_scales_offset = ot.tell()
-        ot.rw_obj_method(binary, binary.rw_static_scales)
-        binary.static_float_channels_offset = ot.tell()
-        ot.rw_obj_method(binary, binary.rw_static_float_channels)
-        binary.keyframe_chunks_offsets_offset = ot.tell()
-        ot.rw_obj_method(binary, binary.rw_keyframe_chunk_offsets)
-        binary.keyframe_chunks_counts_offset = ot.tell()
-        ot.rw_obj_method(binary, binary.rw_keyframe_chunk_counts)
-        binary.animation_masks_offset = ot.tell()
-        binary.bone_mask_offset = ot.tell() if len(binary.bone_masks) or len(binary.float_channel_masks) else 0
-        ot.rw_obj_method(binary, binary.rw_animation_masks)
-        binary.animation_masks_size = ot.tell() - binary.animation_masks_offset
-        keyframes_size = (binary.animated_rotations_count + binary.animated_locations_count + binary.animated_scales_count + binary.animated_float_channel_count) / 8
-        for kf in binary.keyframe_chunks:
-            kf.offset = ot.tell()
-            ot.rw_obj_method(kf, kf.rw_data, keyframes_size)
-
         return binary
 
 
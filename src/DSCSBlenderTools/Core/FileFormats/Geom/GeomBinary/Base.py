@@ -1,4 +1,7 @@
-from ....serialization.Serializable import Serializable
+from concurrent.futures import ProcessPoolExecutor
+
+from ....serialization.BinaryTargets import BufferReader
+from ....serialization.Serializable import Serializable, Field, FieldLayout
 from .MaterialBinary import MaterialBinary
 from .LightBinary import LightBinary
 from .CameraBinary import CameraBinary
@@ -23,6 +26,32 @@ class GeomBinaryBase(Serializable):
     (o) GeomBinary can fully interpret all data in geom files in DSDB archive.
     (o) GeomBinary can write data to geom files.
     """
+    HEADER_LAYOUT = FieldLayout([
+        Field("filetype",              'I', expected=100),  # Always 100.
+        Field("mesh_count",            'H'),
+        Field("material_count",        'H'),
+        Field("light_source_count",    'H'),
+        Field("camera_count",          'H'),
+        Field("ibpm_count",            'I'),
+
+        Field("texture_section_size",  'I'),
+        Field("centre_point",          'f', 3),
+
+        Field("bounding_box_diagonal", 'f', 3),
+        Field("padding_0x3C",          'I', expected=0),
+
+        Field("meshes_offset",         'Q'),
+        Field("materials_offset",      'Q'),
+
+        Field("light_sources_offset",  'Q'),
+        Field("cameras_offset",        'Q'),
+
+        Field("ibpms_offset",          'Q'),
+        Field("padding_0x58",          'Q', expected=0),
+
+        Field("textures_offset",       'Q'),
+        Field("extra_clut_offset",     'Q'),
+    ])
 
     @property
     def MESH_TYPE(self):
@@ -57,6 +86,9 @@ class GeomBinaryBase(Serializable):
         self.textures_offset       = None
         self.extra_clut_offset     = None
 
+        # Process pool to decode the mesh contents with, while reading
+        self.mesh_pool = None
+
         # Data Holders
         self.meshes    = []
         self.materials = []
@@ -78,81 +110,137 @@ class GeomBinaryBase(Serializable):
             f"Geometry: {self.centre_point} {self.bounding_box_diagonal}"
 
     def read_write(self, rw):
-        self.rw_header(rw)
+        rw.rw_deferred_obj_method(self, self.rw_header)
         self.rw_meshes(rw)
-        self.rw_materials(rw)
+        rw.rw_lazy_obj_method(self, self.rw_materials, ("materials",))
         self.rw_textures(rw)
         self.rw_lights(rw)
         self.rw_cameras(rw)
         rw.align(rw.local_tell(), 0x10)
-        self.rw_ibpms(rw)
+        rw.rw_lazy_obj_method(self, self.rw_ibpms, ("ibpms",))
         self.rw_extra_clut(rw)
         rw.assert_at_eof()
 
+    def read(self, filepath, lazy=False, validation="strict", processes=None):
+        """
+        Reads the geom from a file. If 'processes' is given, the contents of
+        the meshes are decoded in parallel in a pool of that many processes,
+        giving the same result as reading them one after another.
+        Cannot be combined with 'lazy'.
+        """
+        if processes is None:
+            super().read(filepath, lazy=lazy, validation=validation)
+            return
+        if lazy:
+            raise ValueError("Meshes cannot be decoded in parallel when reading lazily")
+        with ProcessPoolExecutor(processes) as pool:
+            self.mesh_pool = pool
+            try:
+                super().read(filepath, validation=validation)
+            finally:
+                self.mesh_pool = None
+
+    def probe(self, filepath, validation="strict"):
+        """
+        Reads only the file header, the mesh headers, the materials and the
+        texture names. The reader seeks straight to each of these sections, so
+        the vertex, index, light, camera and IBPM data are never read; the
+        meshes are left without their contents.
+        """
+        with BufferReader(filepath, validation=validation) as rw:
+            rw.rw_obj_method(self, self.rw_probe)
+
+    def rw_probe(self, rw):
+        self.rw_header(rw)
+        if self.meshes_offset:
+            rw.local_seek(self.meshes_offset)
+            self.rw_mesh_headers(rw)
+        if self.materials_offset:
+            rw.local_seek(self.materials_offset)
+            self.rw_materials(rw)
+        if self.textures_offset:
+            rw.local_seek(self.textures_offset)
+            self.rw_textures(rw)
+
     def rw_header(self, rw):
         rw.assert_local_file_pointer_now_at("File Start", 0)
-
-        self.filetype              = rw.rw_uint32(self.filetype)  # Always 100.
-        rw.assert_equal(self.filetype, 100)
-        self.mesh_count            = rw.rw_uint16(self.mesh_count)
-        self.material_count        = rw.rw_uint16(self.material_count)
-        self.light_source_count    = rw.rw_uint16(self.light_source_count)
-        self.camera_count          = rw.rw_uint16(self.camera_count)
-        self.ibpm_count            = rw.rw_uint32(self.ibpm_count)
-
-        self.texture_section_size  = rw.rw_uint32(self.texture_section_size)
-        self.centre_point          = rw.rw_float32s(self.centre_point, 3)
-
-        self.bounding_box_diagonal = rw.rw_float32s(self.bounding_box_diagonal, 3)
-        self.padding_0x3C          = rw.rw_uint32(self.padding_0x3C)
-        rw.assert_is_zero(self.padding_0x3C)
-
-        self.meshes_offset         = rw.rw_uint64(self.meshes_offset)
-        self.materials_offset      = rw.rw_uint64(self.materials_offset)
-
-        self.light_sources_offset  = rw.rw_uint64(self.light_sources_offset)
-        self.cameras_offset        = rw.rw_uint64(self.cameras_offset)
-
-        self.ibpms_offset          = rw.rw_uint64(self.ibpms_offset)
-        self.padding_0x58          = rw.rw_uint64(self.padding_0x58)
-        rw.assert_is_zero(self.padding_0x58)
-
-        self.textures_offset       = rw.rw_uint64(self.textures_offset)
-        self.extra_clut_offset     = rw.rw_uint64(self.extra_clut_offset)
+        rw.rw_layout(self, self.HEADER_LAYOUT)
 
     def rw_meshes(self, rw):
+        self.meshes_offset = rw.tie_to_local_offset(self.meshes_offset, self.mesh_count)
         if self.meshes_offset:
             rw.assert_local_file_pointer_now_at("Meshes", self.meshes_offset)
-            self.meshes = rw.rw_obj_array(self.meshes, self.MESH_TYPE, self.mesh_count)
+            rw.rw_deferred_obj_method(self, self.rw_mesh_headers)
+            if self.mesh_pool is not None and rw.mode() == "read":
+                self.read_mesh_contents_in_pool(rw)
+                return
             for mesh in self.meshes:
-                rw.rw_obj_method(mesh, mesh.rw_contents)
+                rw.rw_lazy_obj_method(mesh, mesh.rw_contents, mesh.CONTENTS_ATTRIBUTES)
+
+    def read_mesh_contents_in_pool(self, rw):
+        """
+        Slices the contents of each mesh out of the buffer and decodes them in
+        'mesh_pool', then attaches the results to the meshes in order.
+        The file pointer is checked against each mesh, as in a serial read.
+        """
+        jobs = []
+        for mesh in self.meshes:
+            start, end = mesh.contents_range()
+            rw.assert_local_file_pointer_now_at("VAO", start)
+            data = rw.rw_bytestring(None, end - start)
+            jobs.append((mesh, data, start, rw.validation))
+
+        for mesh, contents in zip(self.meshes, self.mesh_pool.map(_read_mesh_contents, *zip(*jobs))):
+            for attr, value in zip(mesh.CONTENTS_ATTRIBUTES, contents):
+                setattr(mesh, attr, value)
+
+    def rw_mesh_headers(self, rw):
+        self.meshes = rw.rw_obj_array(self.meshes, self.MESH_TYPE, self.mesh_count)
 
     def rw_materials(self, rw):
+        self.materials_offset = rw.tie_to_local_offset(self.materials_offset, self.material_count)
         if self.materials_offset:
             rw.assert_local_file_pointer_now_at("Materials", self.materials_offset)
             self.materials = rw.rw_obj_array(self.materials, MaterialBinary, self.material_count)
 
     def rw_textures(self, rw):
+        self.textures_offset = rw.tie_to_local_offset(self.textures_offset, self.texture_section_size)
         if self.textures_offset:
             rw.assert_local_file_pointer_now_at("Textures", self.textures_offset)
             self.textures = rw.rw_bytestrings(self.textures, 0x20, self.texture_section_size // 0x20)
 
     def rw_lights(self, rw):
+        self.light_sources_offset = rw.tie_to_local_offset(self.light_sources_offset, self.light_source_count)
         if self.light_sources_offset:
             rw.assert_local_file_pointer_now_at("Lights", self.light_sources_offset)
             self.lights = rw.rw_obj_array(self.lights, LightBinary, self.light_source_count)
 
     def rw_cameras(self, rw):
+        self.cameras_offset = rw.tie_to_local_offset(self.cameras_offset, self.camera_count)
         if self.cameras_offset:
             rw.assert_local_file_pointer_now_at("Cameras", self.cameras_offset)
             self.cameras = rw.rw_obj_array(self.cameras, CameraBinary, self.camera_count)
 
     def rw_ibpms(self, rw):
+        self.ibpms_offset = rw.tie_to_local_offset(self.ibpms_offset, self.ibpm_count)
         if self.ibpms_offset:
             rw.assert_local_file_pointer_now_at("IBPMs", self.ibpms_offset)
             self.ibpms = rw.rw_float32s(self.ibpms, (self.ibpm_count, 12))
 
     def rw_extra_clut(self, rw):
+        self.extra_clut_offset = rw.tie_to_local_offset(self.extra_clut_offset, self.extra_clut is not None)
         if self.extra_clut_offset:
             rw.assert_local_file_pointer_now_at("Extra CLUT", self.extra_clut_offset)
             self.extra_clut = rw.rw_unbounded_bytestring(self.extra_clut)
+
+
+def _read_mesh_contents(mesh, data, start, validation):
+    """
+    Decodes the contents of a mesh from the bytes 'data', which begin at the
+    local offset 'start'. Runs in a worker process of the mesh pool.
+    """
+    rw = BufferReader(None, data, validation)
+    # Local offsets are measured from the start of the file, not of 'data'
+    rw.anchor_pos = -start
+    rw.rw_obj_method(mesh, mesh.rw_contents)
+    return tuple(getattr(mesh, attr) for attr in mesh.CONTENTS_ATTRIBUTES)
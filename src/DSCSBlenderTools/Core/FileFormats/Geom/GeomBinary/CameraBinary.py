@@ -1,7 +1,18 @@
-from ....serialization.Serializable import Serializable
+from ....serialization.Serializable import Serializable, Field, FieldLayout
 
 
 class CameraBinary(Serializable):
+    RECORD_LAYOUT = FieldLayout([
+        Field("bone_name_hash",     'I'),
+        Field("fov",                'f'),
+        Field("aspect_ratio",       'f'),
+        Field("zNear",              'f'),
+        Field("zFar",               'f'),
+        Field("orthographic_scale", 'f'),
+        Field("projection",         'I'),  # 0 = Perspective, 1 = Ortho
+        Field("padding_0x1C",       's', 0x14, expected=bytes(0x14)),
+    ])
+
     def __init__(self):
         super().__init__()
 
@@ -13,13 +24,7 @@ class CameraBinary(Serializable):
         self.zFar               = None
         self.orthographic_scale = None
         self.projection         = None
+        self.padding_0x1C       = bytes(0x14)
 
     def read_write(self, rw):
-        self.bone_name_hash     = rw.rw_uint32(self.bone_name_hash)
-        self.fov                = rw.rw_float32(self.fov)
-        self.aspect_ratio       = rw.rw_float32(self.aspect_ratio)
-        self.zNear              = rw.rw_float32(self.zNear)
-        self.zFar               = rw.rw_float32(self.zFar)
-        self.orthographic_scale = rw.rw_float32(self.orthographic_scale)
-        self.projection         = rw.rw_uint32(self.projection)  # 0 = Perspective, 1 = Ortho
-        rw.align(0x1C, 0x30)
+        rw.rw_layout(self, self.RECORD_LAYOUT)
@@ -1,7 +1,29 @@
-from ....serialization.Serializable import Serializable
+from ....serialization.Serializable import Serializable, Field, FieldLayout
 
 
 class LightBinary(Serializable):
+    RECORD_LAYOUT = FieldLayout([
+        Field("bone_name_hash",    'I'),
+        Field("mode",              'H'),  # 0 = POINT, 2 = AMBIENT, 3 = DIRECTIONAL, 4 = UNKNOWN: Fog?
+        Field("light_id",          'H'),  # Runs from 0 - 4
+
+        Field("intensity",         'f'),
+        Field("unknown_fog_param", 'f'),  # Fog height?
+
+        Field("red",               'f'),
+        Field("green",             'f'),
+        Field("blue",              'f'),
+        Field("alpha",             'f'),
+
+        # Not sure.
+        Field("unknown_0x20",      'i'),
+        Field("unknown_0x24",      'i'),
+        Field("unknown_0x28",      'i'),
+        Field("unknown_0x2C",      'f'),
+
+        Field("padding_0x30",      's', 0x10, expected=bytes(0x10)),
+    ])
+
     def __init__(self):
         super().__init__()
 
@@ -18,24 +40,7 @@ class LightBinary(Serializable):
         self.unknown_0x24      = None
         self.unknown_0x28      = None
         self.unknown_0x2C      = None
+        self.padding_0x30      = bytes(0x10)
 
     def read_write(self, rw):
-        self.bone_name_hash = rw.rw_uint32(self.bone_name_hash)
-        self.mode           = rw.rw_uint16(self.mode) # 0 = POINT, 2 = AMBIENT, 3 = DIRECTIONAL, 4 = UNKNOWN: Fog?
-        self.light_id       = rw.rw_uint16(self.light_id) # Runs from 0 - 4
-
-        self.intensity      = rw.rw_float32(self.intensity)
-        self.unknown_fog_param = rw.rw_float32(self.unknown_fog_param)  # Fog height?
-
-        self.red   = rw.rw_float32(self.red)
-        self.green = rw.rw_float32(self.green)
-        self.blue  = rw.rw_float32(self.blue)
-        self.alpha = rw.rw_float32(self.alpha)
-
-        # Not sure.
-        self.unknown_0x20 = rw.rw_int32(self.unknown_0x20)
-        self.unknown_0x24 = rw.rw_int32(self.unknown_0x24)
-        self.unknown_0x28 = rw.rw_int32(self.unknown_0x28)
-        self.unknown_0x2C = rw.rw_float32(self.unknown_0x2C)
-        
-        rw.align(0x30, 0x40)
+        rw.rw_layout(self, self.RECORD_LAYOUT)
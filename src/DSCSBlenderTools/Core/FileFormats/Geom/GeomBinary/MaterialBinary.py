@@ -1,6 +1,6 @@
 import struct
 
-from ....serialization.Serializable import Serializable
+from ....serialization.Serializable import Serializable, Field, FieldLayout
 
 
 class MaterialBinary(Serializable):
@@ -58,6 +58,14 @@ class MaterialBinary(Serializable):
 
 
 class ShaderUniformBinary(Serializable):
+    RECORD_LAYOUT = FieldLayout([
+        Field("payload",      's', 0x10),
+        Field("index",        'B'),
+        Field("float_count",  'B'),
+        Field("unknown_0x12", 'H'),
+        Field("padding_0x14", 'I'),
+    ])
+
     def __init__(self):
         super().__init__()
         self.payload = None
@@ -67,11 +75,7 @@ class ShaderUniformBinary(Serializable):
         self.padding_0x14 = 0x00000000
 
     def read_write(self, rw):
-        self.payload      = rw.rw_bytestring(self.payload, 0x10)
-        self.index        = rw.rw_uint8(self.index)
-        self.float_count  = rw.rw_uint8(self.float_count)
-        self.unknown_0x12 = rw.rw_uint16(self.unknown_0x12)
-        self.padding_0x14 = rw.rw_uint32(self.padding_0x14)
+        rw.rw_layout(self, self.RECORD_LAYOUT)
 
     def __repr__(self):
         return f"[ShaderUniformBinary] {self.index} {self.unknown_0x12} {self.unpack()}"
@@ -90,6 +94,14 @@ class ShaderUniformBinary(Serializable):
 
 
 class OpenGLSettingBinary(Serializable):
+    RECORD_LAYOUT = FieldLayout([
+        Field("payload",      's', 0x10),
+        Field("index",        'B'),
+        Field("unknown_0x11", 'B'),
+        Field("unknown_0x12", 'H'),
+        Field("padding_0x14", 'I'),
+    ])
+
     def __init__(self):
         super().__init__()
         self.payload = None
@@ -99,11 +111,7 @@ class OpenGLSettingBinary(Serializable):
         self.padding_0x14 = 0x00000000
 
     def read_write(self, rw):
-        self.payload      = rw.rw_bytestring(self.payload, 0x10)
-        self.index        = rw.rw_uint8(self.index)
-        self.unknown_0x11 = rw.rw_uint8(self.unknown_0x11)
-        self.unknown_0x12 = rw.rw_uint16(self.unknown_0x12)
-        self.padding_0x14 = rw.rw_uint32(self.padding_0x14)
+        rw.rw_layout(self, self.RECORD_LAYOUT)
 
     def __repr__(self):
         return f"[OpenGLSettingBinary] {self.index} {self.unknown_0x11} {self.unknown_0x12} {self.unpack()}"
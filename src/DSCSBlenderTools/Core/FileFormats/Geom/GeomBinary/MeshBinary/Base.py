@@ -1,11 +1,22 @@
-import math
-import struct
-
-from .....serialization.Serializable import Serializable
+from .....serialization.Serializable import Serializable, Field, FieldLayout
 from .....serialization.utils import safe_format
 from ...Constants import AttributeTypes, PrimitiveTypes
 
 
+# Names of the vertex attribute fields in the structured VAO dtype
+ATTRIBUTE_NAMES = {v: k.lower() for k, v in vars(AttributeTypes).items() if not k.startswith("_")}
+
+# Normalised integer types map [MIN, MAX] to [-1, 1] or [0, 1]
+NORMALISED_DIVISORS = {
+    'b': 127,
+    'B': 255,
+    'h': 32767,
+    'H': 65535,
+    'i': 2147483647,
+    'I': 4294967295
+}
+
+
 class MeshBinaryBase(Serializable):
     """
     A class to read mesh data within geom files. These files are split into five main sections:
@@ -25,6 +36,40 @@ class MeshBinaryBase(Serializable):
     (o) MeshReader can write data to geom files.
 
     """
+    HEADER_LAYOUT = FieldLayout([
+        Field("vertices_offset",          'Q'),
+        Field("indices_offset",           'Q'),
+        Field("matrix_palette_offset",    'Q'),
+        Field("padding_0x18",             'Q', expected=0),
+
+        Field("vertex_attributes_offset", 'Q'),
+        Field("matrix_palette_count",     'H'),
+        Field("vertex_attribute_count",   'H'),
+        Field("bytes_per_vertex",         'H'),
+        Field("index_type",               'H'),  # 0x1403 / GL_UNSIGNED_SHORT for PC
+
+        Field("vertex_groups_per_vertex", 'B'),  # takes values 0, 1, 2, 3, 4: 0 means map everything to idx 0, 1 means the idxs are in the position vector
+        Field("flags",                    'B'),  # Mesh flags: >>0 - isRendered, >>1 - isWireframe, >>2 - skinning indices are consecutive
+        Field("primitive_type",           'H'),  # 4 or 5: 4 is Triangles, 5 is TriangleStrips... any OpenGL type should work
+        Field("name_hash",                'I'),
+        Field("material_id",              'I'),
+        Field("vertex_count",             'I'),
+
+        Field("index_count",              'I'),
+        Field("padding_0x44",             'I', expected=0),
+        Field("padding_0x48",             'I', expected=0),
+        Field("bounding_sphere_radius",   'f'),
+
+        Field("centre_point",             'f', 3),
+        Field("bounding_box_diagonal",    'f', 3),
+    ])
+
+    # Attributes filled in by rw_contents, which may be parsed lazily
+    CONTENTS_ATTRIBUTES = ("VAO", "matrix_palette", "IBO", "vertex_attributes")
+
+    # Whether the game reads normalised integer vertex attributes as such
+    SUPPORTS_NORMALISED_ATTRIBUTES = True
+
     def __init__(self):
         super().__init__()
 
@@ -74,34 +119,7 @@ class MeshBinaryBase(Serializable):
         Read/write the descriptor for the Mesh.
         These are stored in an array before the mesh contents are given.
         """
-        self.vertices_offset          = rw.rw_uint64(self.vertices_offset)
-        self.indices_offset           = rw.rw_uint64(self.indices_offset)
-        self.matrix_palette_offset    = rw.rw_uint64(self.matrix_palette_offset)
-        self.padding_0x18             = rw.rw_uint64(self.padding_0x18)
-        rw.assert_is_zero(self.padding_0x18)
-
-        self.vertex_attributes_offset = rw.rw_uint64(self.vertex_attributes_offset)
-        self.matrix_palette_count     = rw.rw_uint16(self.matrix_palette_count)
-        self.vertex_attribute_count   = rw.rw_uint16(self.vertex_attribute_count)
-        self.bytes_per_vertex         = rw.rw_uint16(self.bytes_per_vertex)
-        self.index_type               = rw.rw_uint16(self.index_type)  # 0x1403 / GL_UNSIGNED_SHORT for PC
-
-        self.vertex_groups_per_vertex = rw.rw_uint8(self.vertex_groups_per_vertex)  # takes values 0, 1, 2, 3, 4: 0 means map everything to idx 0, 1 means the idxs are in the position vector
-        self.flags                    = rw.rw_uint8(self.flags)  # Mesh flags: >>0 - isRendered, >>1 - isWireframe, >>2 - skinning indices are consecutive
-        self.primitive_type           = rw.rw_uint16(self.primitive_type)  # 4 or 5: 4 is Triangles, 5 is TriangleStrips... any OpenGL type should work
-        self.name_hash                = rw.rw_uint32(self.name_hash)
-        self.material_id              = rw.rw_uint32(self.material_id)
-        self.vertex_count             = rw.rw_uint32(self.vertex_count)
-
-        self.index_count              = rw.rw_uint32(self.index_count)
-        self.padding_0x44             = rw.rw_uint32(self.padding_0x44)
-        rw.assert_is_zero(self.padding_0x44)
-        self.padding_0x48             = rw.rw_uint32(self.padding_0x48)
-        rw.assert_is_zero(self.padding_0x48)
-        self.bounding_sphere_radius   = rw.rw_float32(self.bounding_sphere_radius)
-
-        self.centre_point             = rw.rw_float32s(self.centre_point, 3)
-        self.bounding_box_diagonal    = rw.rw_float32s(self.bounding_box_diagonal, 3)
+        rw.rw_layout(self, self.HEADER_LAYOUT)
 
     def rw_contents(self, rw):
         
@@ -113,14 +131,25 @@ class MeshBinaryBase(Serializable):
         if rw.mode() == "read":
             self.VAO = self.unpack_vertices(vao)
 
+    def contents_range(self):
+        """
+        Returns the local (start, end) offsets of the mesh contents, which run
+        from the start of the VAO to the end of the vertex attributes.
+        """
+        vertex_attributes_size = self.vertex_attribute_count*VertexAttributeBinary.RECORD_LAYOUT.size
+        return self.vertices_offset, self.vertex_attributes_offset + vertex_attributes_size
+
     def rw_VAO(self, rw):
         """
         Read/write the vertex data.
         Corresponds to an OpenGL Vertex Array Object (VAO).
         """
+        # Offset/pointer passes only need the section size, which is known
+        # from the header, so the vertices are only packed when writing
         vao = None
-        if rw.mode() != "read":
+        if rw.mode() == "write":
             vao = self.pack_vertices(self.VAO)
+        self.vertices_offset = rw.tie_to_local_offset(self.vertices_offset, self.vertex_count)
         rw.assert_local_file_pointer_now_at("VAO", self.vertices_offset)
         return rw.rw_bytestring(vao, self.vertex_count*self.bytes_per_vertex)
 
@@ -129,6 +158,7 @@ class MeshBinaryBase(Serializable):
         Read/write the matrix palette.
         States which bones are used by the mesh.
         """
+        self.matrix_palette_offset = rw.tie_to_local_offset(self.matrix_palette_offset, self.matrix_palette_count)
         rw.assert_local_file_pointer_now_at("Matrix Palette", self.matrix_palette_offset)
         self.matrix_palette = rw.rw_uint32s(self.matrix_palette, self.matrix_palette_count)
 
@@ -137,6 +167,7 @@ class MeshBinaryBase(Serializable):
         Read/write the vertex indices.
         Corresponds to an OpenGL Index Buffer Object (IBO).
         """
+        self.indices_offset = rw.tie_to_local_offset(self.indices_offset, self.index_count)
         rw.assert_local_file_pointer_now_at("IBO", self.indices_offset)
         rw_func = self.retrieve_index_rw_function(rw)
         self.IBO = rw_func(self.IBO, self.index_count)
@@ -147,102 +178,102 @@ class MeshBinaryBase(Serializable):
         Read/write the vertex attributes.
         States what properties each vertex contains.
         """
+        self.vertex_attributes_offset = rw.tie_to_local_offset(self.vertex_attributes_offset, self.vertex_attribute_count)
         rw.assert_local_file_pointer_now_at("Vertex Attributes", self.vertex_attributes_offset)
         self.vertex_attributes = rw.rw_obj_array(self.vertex_attributes, VertexAttributeBinary, self.vertex_attribute_count)
 
     ########################################
     # Helpers for (de)serialising vertices #
     ########################################
-    def unpack_vertices(self, vao):
-        # Create unpack functions
-        # Inefficient but can't do much more with Python without making the code very unclean
-        vertices = [Vertex() for _ in range(self.vertex_count)]
-        unpack_funcs = [None]*len(self.vertex_attributes)
-        struct_fmts = [None]*len(self.vertex_attributes)
-        for i, vertex_attribute in enumerate(self.vertex_attributes):
-            dtype = self.DATA_TYPES[vertex_attribute.type]*vertex_attribute.elem_count
-            dsize = struct.calcsize(dtype)
-            struct_fmts[i] = (dtype, dsize)
-            if vertex_attribute.normalised:
-                if   dtype[0] == 'b':
-                    unpack_funcs[i] = lambda x, dtype=dtype: [max(val / 127, -1) for val in struct.unpack(dtype, x)]
-                elif dtype[0] == 'B':
-                    unpack_funcs[i] = lambda x, dtype=dtype: [val / 255 for val in struct.unpack(dtype, x)]
-                elif dtype[0] == 'h':
-                    unpack_funcs[i] = lambda x, dtype=dtype: [max(val / 32767, -1) for val in struct.unpack(dtype, x)]
-                elif dtype[0] == 'H':
-                    unpack_funcs[i] = lambda x, dtype=dtype: [val / 65535 for val in struct.unpack(dtype, x)]
-                elif dtype[0] == 'i':
-                    unpack_funcs[i] = lambda x, dtype=dtype: [max(val / 2147483647, -1) for val in struct.unpack(dtype, x)]
-                elif dtype[0] == 'I':
-                    unpack_funcs[i] = lambda x, dtype=dtype: [(val / 4294967295) for val in struct.unpack(dtype, x)]
-                else: raise ValueError("Non-integer Vertex Attribute was set to 'normalised'")
-            else:
-                unpack_funcs[i] = lambda x, dtype=dtype: struct.unpack(dtype, x)
-
-        # Unpack vertices
-        for vertex_idx, vertex in enumerate(vertices):
-            for unpack_func, (dtype, size), va in zip(unpack_funcs, struct_fmts, self.vertex_attributes):
-                byte_idx = vertex_idx * self.bytes_per_vertex + va.offset
-                bytes = vao[byte_idx:byte_idx + size]
-                vertex.buffer[va.index] = unpack_func(bytes)
-
-        return vertices
-
-    def pack_vertices(self, vertices, make_shader_transforms=None):
-        vertex_binaries = [None]*len(vertices)
-        pack_funcs  = [None]*len(self.vertex_attributes)
-        fmt_sizes = [None] * len(self.vertex_attributes)
-        chunk_sizes = [None] * len(self.vertex_attributes)
-
-        # Generate pack funcs
-        sorted_vas = sorted(self.vertex_attributes, key=lambda x: x.offset)
-        for i, vertex_attribute in enumerate(sorted_vas):
-            dtype = self.DATA_TYPES[vertex_attribute.type]*vertex_attribute.elem_count
-            fmt_sizes[i] = struct.calcsize(dtype)
-            if vertex_attribute.normalised:
-                if   dtype[0] == 'b':
-                    pack_funcs[i] = lambda x, dtype=dtype: struct.pack(dtype, *[int(val * 127) for val in x])
-                elif dtype[0] == 'B':
-                    pack_funcs[i] = lambda x, dtype=dtype: struct.pack(dtype, *[int(val * 255) for val in x])
-                elif dtype[0] == 'h':
-                    pack_funcs[i] = lambda x, dtype=dtype: struct.pack(dtype, *[int(val * 32767) for val in x])
-                elif dtype[0] == 'H':
-                    pack_funcs[i] = lambda x, dtype=dtype: struct.pack(dtype, *[int(val * 65535) for val in x])
-                elif dtype[0] == 'i':
-                    pack_funcs[i] = lambda x, dtype=dtype: struct.pack(dtype, *[int(val * 2147483647) for val in x])
-                elif dtype[0] == 'I':
-                    pack_funcs[i] = lambda x, dtype=dtype: struct.pack(dtype, *[int(val * 4294967295) for val in x])
-                else: raise ValueError("Non-integer Vertex Attribute was set to 'normalised'")
-            elif dtype[0] == "e":
-                def make_pack_func():
-                    def float_packer(xs, dtype=dtype):
-                        out = [None]*len(dtype)
-                        for i, (d, x) in enumerate(zip(dtype, xs)):
-                            if math.isnan(x):
-                                out[i] = b'\xff\x7f'  # Just because it's what nan values seem to be serialised as
-                            else:
-                                out[i] = struct.pack(d, x)
-                        return b''.join(out)
-                    return float_packer
-                pack_funcs[i] = make_pack_func()
-            else:
-                pack_funcs[i] = lambda x, dtype=dtype: struct.pack(dtype, *x)
-
-        # Get space allocation for each vertex attribute
-        for i, (va1, va2) in enumerate(zip(sorted_vas, sorted_vas[1:])):
-            chunk_sizes[i] = va2.offset - va1.offset
-        chunk_sizes[-1] = self.bytes_per_vertex - sorted_vas[-1].offset
+    def vertex_dtype(self):
+        """
+        Builds a NumPy structured dtype describing a single vertex in the VAO,
+        with one (elem_count,)-shaped field per vertex attribute.
+        """
+        import numpy as np
+        endianness = self.context.endianness
+        names   = []
+        formats = []
+        offsets = []
+        for va in self.vertex_attributes:
+            names.append(ATTRIBUTE_NAMES.get(va.index, f"attribute_{va.index}"))
+            formats.append((endianness + self.DATA_TYPES[va.type], (va.elem_count,)))
+            offsets.append(va.offset)
+        return np.dtype({"names": names, "formats": formats, "offsets": offsets, "itemsize": self.bytes_per_vertex})
+
+    def decode_vertices(self, vao):
+        """
+        Decodes the whole VAO at once, returning a dict of vertex attribute
+        index -> (vertex_count, elem_count) array.
+        Normalised integer attributes are converted to floats.
+        """
+        import numpy as np
+        dtype   = self.vertex_dtype()
+        records = np.frombuffer(vao, dtype=dtype, count=self.vertex_count)
+        columns = {}
+        for name, va in zip(dtype.names, self.vertex_attributes):
+            column = records[name]
+            if va.normalised:
+                typecode = self.DATA_TYPES[va.type]
+                if typecode not in NORMALISED_DIVISORS:
+                    raise ValueError("Non-integer Vertex Attribute was set to 'normalised'")
+                column = column / NORMALISED_DIVISORS[typecode]
+                if typecode.islower():
+                    column = np.maximum(column, -1)
+            columns[va.index] = column
+        return columns
 
-        # Construct vertices
-        vertex_binary = [None]*len(self.vertex_attributes)
-        for vertex_idx, vertex in enumerate(vertices):
-            for va_idx, (pack_func, fmt_size, alloc_size, va) in enumerate(zip(pack_funcs, fmt_sizes, chunk_sizes, sorted_vas)):
-                vertex_binary[va_idx] = pack_func(vertex.buffer[va.index])
-                vertex_binary[va_idx] += b'\x00'*(alloc_size - fmt_size)
-            vertex_binaries[vertex_idx] = b''.join(vertex_binary)
-        return b''.join(vertex_binaries)
+    def unpack_vertices(self, vao):
+        from .VertexBuffer import VertexBuffer
+        return VertexBuffer.from_columns(self.vertex_count, self.decode_vertices(vao))
 
+    def encode_vertices(self, columns, vertex_count):
+        """
+        The inverse of decode_vertices: packs a dict of vertex attribute
+        index -> (vertex_count, elem_count) array-like into VAO bytes.
+        Normalised attributes are scaled and truncated to integers, and NaN
+        halves are written as 0x7FFF. Other integer attributes must already
+        hold integers; NaN or fractional values raise a ValueError.
+        """
+        import numpy as np
+        dtype   = self.vertex_dtype()
+        records = np.zeros(vertex_count, dtype=dtype)
+        for name, va in zip(dtype.names, self.vertex_attributes):
+            typecode = self.DATA_TYPES[va.type]
+            column   = np.asarray(columns[va.index]).reshape(vertex_count, va.elem_count)
+            if va.normalised:
+                if typecode not in NORMALISED_DIVISORS:
+                    raise ValueError("Non-integer Vertex Attribute was set to 'normalised'")
+                column = np.trunc(column * NORMALISED_DIVISORS[typecode])
+
+            target = records[name]
+            if typecode in NORMALISED_DIVISORS:
+                # Reject anything that would be silently cast, as packing each value individually would
+                if np.any(np.isnan(column)):
+                    raise ValueError(f"Vertex attribute {va.index} has NaN values, which cannot be packed as type '{typecode}'.")
+                if np.any(column != np.trunc(column)):
+                    raise ValueError(f"Vertex attribute {va.index} has non-integer values, which cannot be packed as type '{typecode}'.")
+                limits = np.iinfo(target.dtype)
+                if column.size and (column.min() < limits.min or column.max() > limits.max):
+                    raise ValueError(f"Vertex attribute {va.index} has values outside the range of type '{typecode}'.")
+                target[...] = column
+            else:
+                target[...] = column
+                if np.any(np.isinf(target) & np.isfinite(column)):
+                    raise OverflowError(f"Vertex attribute {va.index} has values too large to pack as type '{typecode}'.")
+                if typecode == 'e':
+                    # Just because it's what nan values seem to be serialised as
+                    halves = target.view(target.dtype.byteorder + 'u2')
+                    halves[np.isnan(column)] = np.frombuffer(b'\xff\x7f', dtype=halves.dtype)[0]
+        return records.tobytes()
+
+    def pack_vertices(self, vertices):
+        if hasattr(vertices, "columns"):
+            # Already columnar
+            columns = vertices.columns
+        else:
+            columns = {va.index: [vertex.buffer[va.index] for vertex in vertices] for va in self.vertex_attributes}
+        return self.encode_vertices(columns, len(vertices))
 
     def get_default_unpack_shader_transforms(self):
         return self.get_default_shader_transforms()
@@ -274,9 +305,12 @@ class MeshBinaryBase(Serializable):
             transform.attribute_transform_pack(vertex_attributes)
             
         vtx_transforms = [t for t in transforms if t.TRANSFORM_VERTICES]
-        for vertex in vertices:
-            for transform in vtx_transforms:
-                transform.vertex_transform_pack(vertex)
+        for transform in vtx_transforms:
+            if self.__transforms_arrays(transform, vertices):
+                transform.array_transform_pack(vertices)
+            else:
+                for vertex in vertices:
+                    transform.vertex_transform_pack(vertex)
         
     def apply_shader_transforms_unpack(self, vertices, vertex_attributes, override_transforms=None):
         if not len(vertices):
@@ -290,9 +324,18 @@ class MeshBinaryBase(Serializable):
         #     transform.attribute_transform_unpack(vertex_attributes)
             
         vtx_transforms = [t for t in transforms if t.TRANSFORM_VERTICES]
-        for vertex in vertices:
-            for transform in vtx_transforms:
-                transform.vertex_transform_unpack(vertex)
+        for transform in vtx_transforms:
+            if self.__transforms_arrays(transform, vertices):
+                transform.array_transform_unpack(vertices)
+            else:
+                for vertex in vertices:
+                    transform.vertex_transform_unpack(vertex)
+
+    @staticmethod
+    def __transforms_arrays(transform, vertices):
+        # Columnar vertex buffers are transformed a whole attribute array at a
+        # time where possible, and a vertex at a time otherwise
+        return hasattr(vertices, "columns") and transform.supports_arrays(vertices)
         
 
     @property
@@ -323,6 +366,14 @@ class MeshBinaryBase(Serializable):
         raise NotImplementedError("get_default_vertex_attributes not implemented on subclass")
 
 class VertexAttributeBinary(Serializable):
+    RECORD_LAYOUT = FieldLayout([
+        Field("index",      'B'),
+        Field("normalised", 'B'),  # Unused in cgGL
+        Field("elem_count", 'H'),
+        Field("type",       'H'),
+        Field("offset",     'H'),
+    ])
+
     def __init__(self, index=None, normalised=None, elem_count=None, type=None, offset=None):
         super().__init__()
         self.index      = index
@@ -335,11 +386,7 @@ class VertexAttributeBinary(Serializable):
         return f"[Geom::Mesh::VertexAttributeBinary] {self.index} {self.normalised} {self.elem_count} {self.type} {self.offset}"
 
     def read_write(self, rw):
-        self.index      = rw.rw_uint8(self.index)
-        self.normalised = rw.rw_uint8(self.normalised)  # Unused in cgGL
-        self.elem_count = rw.rw_uint16(self.elem_count)
-        self.type       = rw.rw_uint16(self.type)
-        self.offset     = rw.rw_uint16(self.offset)
+        rw.rw_layout(self, self.RECORD_LAYOUT)
 
 
 class Vertex:
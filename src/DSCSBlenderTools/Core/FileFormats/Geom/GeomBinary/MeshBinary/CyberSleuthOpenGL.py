@@ -6,6 +6,9 @@ from .ShaderTransforms import PosPackedIndex, IndexDiv3
 
 
 class MeshBinaryDSCSOpenGL(MeshBinaryBase):
+    # The normalised flag is unused in cgGL
+    SUPPORTS_NORMALISED_ATTRIBUTES = False
+
     __DATA_TYPES = {
         0x1400: 'b',
         0x1401: 'B',
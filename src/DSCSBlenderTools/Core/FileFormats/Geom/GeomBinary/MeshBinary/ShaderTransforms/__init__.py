@@ -4,6 +4,7 @@ from ..Base import AttributeTypes
 class ShaderTransform:
     TRANSFORM_VERTICES = True
     TRANSFORM_ATTRS    = True
+    ARRAY_ATTRIBUTES   = None  # Attributes used by the array transforms; None if there are no array transforms
     
     def poll(self, vertex):
         raise NotImplementedError
@@ -13,6 +14,21 @@ class ShaderTransform:
         
     def vertex_transform_pack(self, vertex):
         raise NotImplementedError
+
+    def supports_arrays(self, vertices):
+        """
+        Whether the array transforms can be applied to a VertexBuffer, which
+        requires every attribute they use to have one element count.
+        """
+        if self.ARRAY_ATTRIBUTES is None:
+            return False
+        return not any(attr in vertices.masks for attr in self.ARRAY_ATTRIBUTES)
+
+    def array_transform_unpack(self, vertices):
+        raise NotImplementedError
+
+    def array_transform_pack(self, vertices):
+        raise NotImplementedError
     
     def attribute_transform_pack(self, attributes):
         raise NotImplementedError
@@ -21,6 +37,7 @@ class ShaderTransform:
 class PosPackedIndex(ShaderTransform):
     TRANSFORM_VERTICES = True
     TRANSFORM_ATTRS    = True
+    ARRAY_ATTRIBUTES   = (AttributeTypes.POSITION, AttributeTypes.INDEX)
     
     def poll(self, vertex):
         return vertex.position is not None
@@ -34,6 +51,21 @@ class PosPackedIndex(ShaderTransform):
         vertex.position = [*vertex.position, *vertex.indices]
         vertex.indices = None
         vertex.weights = None
+
+    def array_transform_unpack(self, vertices):
+        import numpy as np
+        position = vertices.column(AttributeTypes.POSITION)
+        vertices.set_column(AttributeTypes.INDEX,    position[:, -1:].astype(np.int64))
+        vertices.set_column(AttributeTypes.WEIGHT,   np.ones((len(vertices), 1)))
+        vertices.set_column(AttributeTypes.POSITION, position[:, :-1])
+
+    def array_transform_pack(self, vertices):
+        import numpy as np
+        position = vertices.column(AttributeTypes.POSITION)
+        indices  = vertices.column(AttributeTypes.INDEX)
+        vertices.set_column(AttributeTypes.POSITION, np.concatenate([position, indices], axis=1))
+        vertices.remove_attribute(AttributeTypes.INDEX)
+        vertices.remove_attribute(AttributeTypes.WEIGHT)
     
     def attribute_transform_pack(self, attributes):
         attributes[AttributeTypes.POSITION].count += attributes[AttributeTypes.INDEX].count
@@ -57,10 +89,22 @@ class UVDiv1024(ShaderTransform):
     def vertex_transform_pack(self, vertex):
         vertex.buffer[self.attribute] = [int(d*1024) for d in vertex.buffer[self.attribute]]
 
+    @property
+    def ARRAY_ATTRIBUTES(self):
+        return (self.attribute,)
+
+    def array_transform_unpack(self, vertices):
+        vertices.set_column(self.attribute, vertices.column(self.attribute) / 1024)
+
+    def array_transform_pack(self, vertices):
+        import numpy as np
+        vertices.set_column(self.attribute, np.trunc(vertices.column(self.attribute)*1024).astype(np.int64))
+
 
 class IndexDiv3(ShaderTransform):
     TRANSFORM_VERTICES = True
     TRANSFORM_ATTRS    = False
+    ARRAY_ATTRIBUTES   = (AttributeTypes.INDEX,)
     
     def poll(self, vertex):
         return vertex.indices is not None
@@ -71,6 +115,13 @@ class IndexDiv3(ShaderTransform):
     def vertex_transform_unpack(self, vertex):
         vertex.indices = [int(i*3) for i in vertex.indices]
 
+    def array_transform_pack(self, vertices):
+        vertices.set_column(AttributeTypes.INDEX, vertices.column(AttributeTypes.INDEX) // 3)
+
+    def array_transform_unpack(self, vertices):
+        import numpy as np
+        vertices.set_column(AttributeTypes.INDEX, np.trunc(vertices.column(AttributeTypes.INDEX)*3).astype(np.int64))
+
 class TypeCast(ShaderTransform):
     TRANSFORM_VERTICES = False
     TRANSFORM_ATTRS    = True
@@ -0,0 +1,355 @@
+import numpy as np
+
+from .Base import AttributeTypes, Vertex
+
+
+class VertexBuffer:
+    """
+    Struct-of-arrays storage for the vertices of a mesh.
+    Each vertex attribute present in the buffer is held as a single
+    (count, elem_count) array in 'columns', keyed by its AttributeTypes index
+    (i.e. its slot in Vertex.buffer).
+    Attributes that do not have the same number of elements on every vertex,
+    such as the bone indices and weights of vertices belonging to different
+    numbers of vertex groups, are zero-padded to the widest vertex and given
+    a boolean (count, elem_count) array in 'masks' marking the elements that
+    are actually present. A vertex with no elements present for an attribute
+    reads back as None for that attribute.
+    Indexing the buffer yields VertexView rows, which can be read wherever a
+    Vertex is expected. Unlike a Vertex, the attributes of a row are returned
+    as tuples, so an attribute can only be changed by assigning the whole of
+    it, e.g. 'row.position = [...]'. Vertices are added with 'append' and
+    'extend', the only list methods the buffer provides.
+    Arrays that are shared with another buffer through 'copy' are read-only,
+    and are copied by whichever buffer writes into them first. Whole columns
+    can always be replaced with 'set_column'.
+    """
+    __slots__ = ("count", "columns", "masks")
+
+    SLOT_COUNT = 12
+
+    def __init__(self, count=0):
+        self.count   = count
+        self.columns = {}
+        self.masks   = {}
+
+    def __repr__(self):
+        return f"[Geom::VertexBuffer] {self.count} vertices, attributes {sorted(self.columns)}"
+
+    @classmethod
+    def from_vertices(cls, vertices):
+        instance = cls(len(vertices))
+        for attr in range(cls.SLOT_COUNT):
+            rows = [v.buffer[attr] for v in vertices]
+            if any(row is not None for row in rows):
+                instance.set_rows(attr, rows)
+        return instance
+
+    @classmethod
+    def from_columns(cls, count, columns):
+        instance = cls(count)
+        for attr, column in columns.items():
+            instance.set_column(attr, column)
+        return instance
+
+    @classmethod
+    def concatenate(cls, buffers):
+        """
+        Returns a buffer holding the vertices of each of 'buffers' in turn.
+        Attributes that are missing from, or narrower in, some of the buffers
+        are zero-padded and masked out.
+        """
+        instance = cls(sum(b.count for b in buffers))
+        for attr in sorted({attr for b in buffers for attr in b.columns}):
+            present = [b.columns[attr] for b in buffers if attr in b.columns]
+            width   = max(column.shape[1] for column in present)
+            dtype   = np.result_type(*present)
+            columns = []
+            masks   = []
+            for b in buffers:
+                if attr in b.columns:
+                    pad = ((0, 0), (0, width - b.columns[attr].shape[1]))
+                    columns.append(np.pad(b.columns[attr], pad))
+                    masks.append(np.pad(b.element_mask(attr), pad))
+                else:
+                    columns.append(np.zeros((b.count, width), dtype=dtype))
+                    masks.append(np.zeros((b.count, width), dtype=bool))
+            instance.set_column(attr, np.concatenate(columns).astype(dtype, copy=False), np.concatenate(masks))
+        return instance
+
+    def append(self, vertex):
+        self.extend([vertex])
+
+    def extend(self, vertices):
+        if not isinstance(vertices, VertexBuffer):
+            vertices = VertexBuffer.from_vertices(list(vertices))
+        merged = VertexBuffer.concatenate([self, vertices])
+        self.count   = merged.count
+        self.columns = merged.columns
+        self.masks   = merged.masks
+
+    def copy(self):
+        """
+        Returns a buffer that shares this buffer's arrays until either of them
+        is written to.
+        """
+        instance = VertexBuffer(self.count)
+        for source, target in ((self.columns, instance.columns), (self.masks, instance.masks)):
+            for attr, array in source.items():
+                if array.flags.writeable:
+                    array = array.view()
+                    array.flags.writeable = False
+                    source[attr] = array
+                target[attr] = array
+        return instance
+
+    def to_vertices(self):
+        vertices = [Vertex() for _ in range(self.count)]
+        for attr in self.columns:
+            for vertex, row in zip(vertices, self.rows(attr)):
+                vertex.buffer[attr] = row
+        return vertices
+
+    def take(self, order):
+        """
+        Returns a new buffer holding the vertices at the positions in 'order'.
+        """
+        order = np.asarray(order, dtype=np.int64)
+        instance = VertexBuffer(len(order))
+        for attr, column in self.columns.items():
+            instance.columns[attr] = column[order]
+        for attr, mask in self.masks.items():
+            instance.masks[attr] = mask[order]
+        return instance
+
+    def packed_rows(self):
+        """
+        Returns a (count,) array of opaque records holding the raw bytes of
+        every attribute of each vertex, so that vertices compare equal exactly
+        when their attributes are bit-identical. Elements that are not present
+        are zeroed so that they do not affect the comparison.
+        """
+        parts = []
+        for attr in sorted(self.columns):
+            column = self.columns[attr]
+            mask   = self.masks.get(attr)
+            if mask is not None:
+                column = np.where(mask, column, np.zeros((), dtype=column.dtype))
+                parts.append(mask.view(np.uint8))
+            parts.append(np.ascontiguousarray(column).view(np.uint8).reshape(self.count, -1))
+        rows = np.ascontiguousarray(np.concatenate([np.zeros((self.count, 0), dtype=np.uint8), *parts], axis=1))
+        if not rows.shape[1]:
+            # Vertices without any attributes are all identical
+            rows = np.zeros((self.count, 1), dtype=np.uint8)
+        return rows.view(np.dtype((np.void, rows.shape[1]))).reshape(self.count)
+
+    ######################
+    # Attribute Handling #
+    ######################
+    @property
+    def mask(self):
+        """
+        A boolean array with one entry per Vertex.buffer slot, stating which
+        attributes are present in the buffer.
+        """
+        mask = np.zeros(self.SLOT_COUNT, dtype=bool)
+        mask[list(self.columns)] = True
+        return mask
+
+    def has_attribute(self, attr):
+        return attr in self.columns
+
+    def column(self, attr):
+        """
+        Returns the (count, elem_count) array for an attribute, or None if the
+        attribute is not present.
+        """
+        return self.columns.get(attr)
+
+    def element_mask(self, attr):
+        """
+        Returns the boolean (count, elem_count) array of elements present for
+        an attribute.
+        """
+        if attr in self.masks:
+            return self.masks[attr]
+        column = self.columns[attr]
+        return np.ones(column.shape, dtype=bool)
+
+    def set_column(self, attr, column, mask=None):
+        column = np.asarray(column)
+        if column.ndim == 1:
+            column = column.reshape(-1, 1)
+        if len(column) != self.count:
+            raise ValueError(f"Expected {self.count} rows for attribute {attr}, but received {len(column)}.")
+        self.columns[attr] = column
+        if mask is None or np.all(mask):
+            self.masks.pop(attr, None)
+        else:
+            self.masks[attr] = np.asarray(mask, dtype=bool)
+
+    def remove_attribute(self, attr):
+        self.columns.pop(attr, None)
+        self.masks.pop(attr, None)
+
+    def set_rows(self, attr, rows):
+        """
+        Sets an attribute from a sequence of per-vertex element lists, any of
+        which may be None or of differing lengths.
+        """
+        if len(rows) != self.count:
+            raise ValueError(f"Expected {self.count} rows for attribute {attr}, but received {len(rows)}.")
+        lengths = [0 if row is None else len(row) for row in rows]
+        width   = max(lengths, default=0)
+        if all(length == width for length in lengths):
+            self.set_column(attr, np.array(rows).reshape(self.count, width))
+            return
+
+        elements = [elem for row in rows if row is not None for elem in row]
+        column   = np.zeros((self.count, width), dtype=np.asarray(elements).dtype)
+        mask     = np.arange(width)[None, :] < np.array(lengths)[:, None]
+        column[mask] = elements
+        self.set_column(attr, column, mask)
+
+    def rows(self, attr):
+        """
+        Returns an attribute as a list of per-vertex element lists, with None
+        for vertices that do not have the attribute.
+        """
+        column = self.columns.get(attr)
+        if column is None:
+            return [None]*self.count
+        rows = column.tolist()
+        mask = self.masks.get(attr)
+        if mask is not None:
+            rows = [[elem for elem, present in zip(row, row_mask) if present] or None
+                    for row, row_mask in zip(rows, mask.tolist())]
+        return rows
+
+    def get_row(self, attr, idx):
+        """
+        Returns the elements of an attribute for a single vertex as a tuple,
+        or None if the vertex does not have the attribute.
+        """
+        column = self.columns.get(attr)
+        if column is None:
+            return None
+        row = tuple(column[idx].tolist())
+        mask = self.masks.get(attr)
+        if mask is not None:
+            row = tuple(elem for elem, present in zip(row, mask[idx]) if present) or None
+        return row
+
+    def set_row(self, attr, idx, value):
+        column = self.columns.get(attr)
+        if value is None:
+            if column is not None:
+                self.__writeable_mask(attr)[idx] = False
+            return
+
+        value = list(value)
+        if column is None:
+            self.set_column(attr, np.zeros((self.count, len(value)), dtype=np.asarray(value).dtype),
+                            np.zeros((self.count, len(value)), dtype=bool))
+        elif len(value) > column.shape[1]:
+            pad = ((0, 0), (0, len(value) - column.shape[1]))
+            self.set_column(attr, np.pad(column, pad), np.pad(self.element_mask(attr), pad))
+        column = self.__writeable_column(attr, np.asarray(value).dtype)
+
+        column[idx, :len(value)] = value
+        if len(value) < column.shape[1] or attr in self.masks:
+            mask = self.__writeable_mask(attr)
+            mask[idx] = False
+            mask[idx, :len(value)] = True
+
+    def __writeable_column(self, attr, dtype):
+        column = self.columns[attr]
+        dtype  = np.result_type(column, dtype)
+        if column.dtype != dtype or not column.flags.writeable:
+            column = column.astype(dtype)
+            self.columns[attr] = column
+        return column
+
+    def __writeable_mask(self, attr):
+        mask = self.masks.get(attr)
+        if mask is None:
+            mask = np.ones(self.columns[attr].shape, dtype=bool)
+            self.masks[attr] = mask
+        elif not mask.flags.writeable:
+            mask = mask.copy()
+            self.masks[attr] = mask
+        return mask
+
+    #####################
+    # Sequence Protocol #
+    #####################
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [VertexView(self, i) for i in range(*idx.indices(self.count))]
+        if idx < 0:
+            idx += self.count
+        if not 0 <= idx < self.count:
+            raise IndexError("VertexBuffer index out of range")
+        return VertexView(self, idx)
+
+    def __iter__(self):
+        for idx in range(self.count):
+            yield VertexView(self, idx)
+
+    #################
+    # Named Columns #
+    #################
+    @property
+    def position(self): return self.column(AttributeTypes.POSITION)
+    @property
+    def normal(self): return self.column(AttributeTypes.NORMAL)
+    @property
+    def tangent(self): return self.column(AttributeTypes.TANGENT)
+    @property
+    def binormal(self): return self.column(AttributeTypes.BINORMAL)
+    @property
+    def UV1(self): return self.column(AttributeTypes.UV1)
+    @property
+    def UV2(self): return self.column(AttributeTypes.UV2)
+    @property
+    def UV3(self): return self.column(AttributeTypes.UV3)
+    @property
+    def color(self): return self.column(AttributeTypes.COLOR)
+    @property
+    def indices(self): return self.column(AttributeTypes.INDEX)
+    @property
+    def weights(self): return self.column(AttributeTypes.WEIGHT)
+
+
+class VertexView(Vertex):
+    """
+    A single row of a VertexBuffer, with the same attributes as a Vertex.
+    Reads and writes go straight through to the buffer. Attributes are read
+    back as immutable tuples, since changing the elements of a copy would
+    not reach the buffer; assign the whole attribute instead.
+    """
+    __slots__ = ("source", "idx")
+
+    def __init__(self, source, idx):
+        self.source = source
+        self.idx    = idx
+
+    @property
+    def buffer(self):
+        return self
+
+    def __getitem__(self, attr):
+        return self.source.get_row(attr, self.idx)
+
+    def __setitem__(self, attr, value):
+        self.source.set_row(attr, self.idx, value)
+
+    def __len__(self):
+        return self.source.SLOT_COUNT
+
+    def __iter__(self):
+        for attr in range(self.source.SLOT_COUNT):
+            yield self[attr]
@@ -1,3 +1,5 @@
+import numpy as np
+
 from ..GeomBinary.MeshBinary.Base import PrimitiveTypes
 
 
@@ -53,27 +55,99 @@ class Triangles(IndexType):
 
     @classmethod
     def from_triangles(cls, data_type, triangles):
-        buffer = [idx for tri in triangles for idx in tri]
+        buffer = np.asarray(triangles, dtype=np.int64).reshape(-1).tolist()
         return cls(data_type, buffer)
 
     def unpack(self):
-        return [(t1, t2, t3) for t1, t2, t3 in zip(self.buffer[0::3], self.buffer[1::3], self.buffer[2::3])]
+        """
+        Returns the triangles as an (n, 3) array of vertex indices.
+        """
+        buffer = np.asarray(self.buffer, dtype=np.int64)
+        return buffer[:len(buffer) - len(buffer) % 3].reshape(-1, 3)
 
 
 class TriangleStrip(IndexType):
     def __init__(self, data_type, buffer):
         super().__init__(PrimitiveTypes.TRIANGLE_STRIP, data_type, buffer)
 
-    def to_triangles(self):
+    @classmethod
+    def from_triangles(cls, data_type, triangles):
+        """
+        Stitches a triangle list into a single strip by walking across shared
+        edges, joining the runs with degenerate triangles.
+        'to_triangles' gives back the same triangles with the same winding,
+        although they may come back in a different order and starting from a
+        different corner.
+        """
+        triangles = [tuple(tri) for tri in triangles]
+        for tri in triangles:
+            if len(tri) != 3 or len(set(tri)) < 3:
+                raise ValueError(f"Cannot represent the triangle {tri} in a triangle strip")
+
+        # Look up unused triangles by their directed edges and by their vertices
+        edge_map   = {}
+        vertex_map = {}
+        for i, (v1, v2, v3) in enumerate(triangles):
+            for edge in ((v1, v2), (v2, v3), (v3, v1)):
+                edge_map.setdefault(edge, []).append(i)
+            for v in (v1, v2, v3):
+                vertex_map.setdefault(v, []).append(i)
+        used = [False]*len(triangles)
+
+        def find_unused(candidates):
+            while len(candidates) and used[candidates[-1]]:
+                candidates.pop()
+            return candidates[-1] if len(candidates) else None
+
+        def find_continuation(buffer, length):
+            # Odd triangles in a strip have their first two vertices swapped
+            v1, v2 = buffer[-2], buffer[-1]
+            edge = (v2, v1) if length % 2 else (v1, v2)
+            return find_unused(edge_map.get(edge, [])), edge
+
         buffer = []
-        for i, (t1, t2, t3) in enumerate(zip(self.buffer[0:], self.buffer[1:], self.buffer[2:])):
-            if len({t1, t2, t3}) < 3:
-                continue
-            if i % 2:
-                buffer.extend((t2, t1, t3))
+        first_unused = 0
+        while True:
+            # Extend the strip for as long as an unused triangle shares its last edge
+            while len(buffer) >= 2:
+                idx, edge = find_continuation(buffer, len(buffer))
+                if idx is None:
+                    break
+                used[idx] = True
+                buffer.append(_third_vertex(triangles[idx], *edge))
+
+            # Restart from an unused triangle, preferring one that shares the
+            # last index of the strip
+            idx = None if not len(buffer) else find_unused(vertex_map[buffer[-1]])
+            if idx is None:
+                while first_unused < len(triangles) and used[first_unused]:
+                    first_unused += 1
+                if first_unused == len(triangles):
+                    break
+                idx = first_unused
+            used[idx] = True
+
+            candidates = _strip_restarts(buffer, triangles[idx])
+            for candidate in candidates:
+                if find_continuation(candidate, len(buffer) + len(candidate))[0] is not None:
+                    break
             else:
-                buffer.extend((t1, t2, t3))
-        return Triangles(self.data_type, buffer)
+                candidate = candidates[0]
+            buffer.extend(candidate)
+        return cls(data_type, buffer)
+
+    def to_triangles(self):
+        strip = np.asarray(self.buffer, dtype=np.int64)
+        if len(strip) < 3:
+            return Triangles(self.data_type, strip[:0])
+        t1, t2, t3 = strip[:-2], strip[1:-1], strip[2:]
+
+        # Odd triangles have their first two vertices swapped to keep the
+        # winding consistent, and degenerate triangles are dropped
+        odd = (np.arange(len(t1)) % 2).astype(bool)
+        triangles = np.stack([np.where(odd, t2, t1), np.where(odd, t1, t2), t3], axis=1)
+        keep = (t1 != t2) & (t2 != t3) & (t1 != t3)
+        return Triangles(self.data_type, triangles[keep].reshape(-1))
 
 
 class TriangleFan(IndexType):
@@ -81,6 +155,57 @@ class TriangleFan(IndexType):
         super().__init__(PrimitiveTypes.TRIANGLE_FAN, data_type, buffer)
 
 
+def _third_vertex(tri, v1, v2):
+    """
+    Returns the vertex of 'tri' that follows the directed edge (v1, v2), or
+    None if the triangle does not contain that edge.
+    """
+    for i in range(3):
+        if tri[i] == v1 and tri[(i+1) % 3] == v2:
+            return tri[(i+2) % 3]
+    return None
+
+
+def _strip_restarts(buffer, tri):
+    """
+    Returns the index sequences that could be appended to the strip 'buffer'
+    to start a new run at 'tri'. All triangles created between the runs are
+    degenerate.
+    """
+    rotations = [tri[i:] + tri[:i] for i in range(3)]
+    if not len(buffer):
+        return rotations
+
+    last = buffer[-1]
+    odd  = len(buffer) % 2
+    if last in tri:
+        # Repeating the last index starts the new run from it
+        rotation = rotations[tri.index(last)]
+        if odd:
+            return [(last, rotation[2], rotation[1])]
+        else:
+            return [(last, rotation[1], rotation[2])]
+    if odd:
+        return [(last, r[1], r[1], r[0], r[2]) for r in rotations]
+    else:
+        return [(last, r[0], r[0], r[1], r[2]) for r in rotations]
+
+
+def create_smallest_triangle_interface(data_type, triangles):
+    """
+    Returns whichever of a triangle list or a triangle strip needs the fewer
+    indices to represent 'triangles'.
+    """
+    triangles = Triangles.from_triangles(data_type, triangles)
+    try:
+        strip = TriangleStrip.from_triangles(data_type, triangles.unpack().tolist())
+    except ValueError:
+        return triangles
+    if len(strip.buffer) < len(triangles.buffer):
+        return strip
+    return triangles
+
+
 def create_index_interface(primitive_type, data_type, buffer):
     if primitive_type == PrimitiveTypes.POINTS:
         return Points(data_type, buffer)
@@ -0,0 +1,63 @@
+MAX_MATRIX_PALETTE_SIZE = 54
+
+
+def partition_by_palette(bone_sets, max_palette_size=MAX_MATRIX_PALETTE_SIZE):
+    """
+    Groups triangles, given as the set of bones that each one references,
+    into as few partitions as possible whose combined bone sets fit in a
+    matrix palette of 'max_palette_size' bones.
+    Triangles that reference the same bones are clustered together first.
+    The clusters are then packed into whichever partition they grow the
+    least, in order of their bone indices so that neighbouring bones tend to
+    end up in the same partition. Finally, any partitions whose palettes
+    still fit together are merged, most overlapping first.
+    Returns a list of (palette, triangle_indices) pairs.
+    """
+    clusters = {}
+    for i, bones in enumerate(bone_sets):
+        clusters.setdefault(frozenset(bones), []).append(i)
+    for bones in clusters:
+        if len(bones) > max_palette_size:
+            raise ValueError(f"A triangle references {len(bones)} bones, which cannot fit in a matrix palette of {max_palette_size} bones")
+
+    # Greedy clustering
+    partitions = []
+    for bones, triangles in sorted(clusters.items(), key=lambda item: sorted(item[0])):
+        best_partition = None
+        best_growth    = None
+        for partition in partitions:
+            growth = len(bones - partition[0])
+            if len(partition[0]) + growth > max_palette_size:
+                continue
+            if best_partition is None or growth < best_growth:
+                best_partition = partition
+                best_growth    = growth
+                if growth == 0:
+                    break
+        if best_partition is None:
+            partitions.append([set(bones), list(triangles)])
+        else:
+            best_partition[0].update(bones)
+            best_partition[1].extend(triangles)
+
+    # Merge partitions with overlapping palettes
+    while True:
+        best_pair    = None
+        best_overlap = -1
+        for i in range(len(partitions)):
+            for j in range(i+1, len(partitions)):
+                union = len(partitions[i][0] | partitions[j][0])
+                if union > max_palette_size:
+                    continue
+                overlap = len(partitions[i][0]) + len(partitions[j][0]) - union
+                if overlap > best_overlap:
+                    best_pair    = (i, j)
+                    best_overlap = overlap
+        if best_pair is None:
+            break
+        i, j = best_pair
+        partitions[i][0].update(partitions[j][0])
+        partitions[i][1].extend(partitions[j][1])
+        del partitions[j]
+
+    return [(sorted(bones), sorted(triangles)) for bones, triangles in partitions]
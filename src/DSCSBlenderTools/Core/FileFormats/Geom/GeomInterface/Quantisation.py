@@ -0,0 +1,84 @@
+import struct
+
+import numpy as np
+
+from ..GeomBinary.MeshBinary.Base import VertexAttributeBinary
+
+
+# Encodings that floating-point vertex attributes may be stored with, as
+# (typecode, normalised) pairs
+FLOAT_ENCODINGS = [
+    ('f', 0),
+    ('e', 0),
+    ('h', 1),
+    ('H', 1),
+    ('b', 1),
+    ('B', 1)
+]
+
+
+def attribute_size(typecode, count):
+    """
+    Returns the number of bytes a vertex attribute takes up in each vertex,
+    including the padding to a 4-byte boundary.
+    """
+    size = struct.calcsize(typecode)*count
+    size += (0x04 - (size % 0x04)) % 0x04
+    return size
+
+
+def measure_encoding_error(binary, index, column, typecode, normalised):
+    """
+    Round-trips an attribute column through the VAO codec of the mesh binary
+    'binary', and returns the largest absolute error. Returns None if the
+    values cannot be represented with the encoding at all.
+    """
+    column = np.asarray(column, dtype=np.float64)
+    if typecode not in binary.INVERSE_DATA_TYPES:
+        return None
+
+    # A throwaway mesh binary holding only this attribute
+    probe = type(binary)()
+    probe.context.endianness = binary.context.endianness
+    probe.vertex_attributes = [VertexAttributeBinary(index, normalised, column.shape[1], binary.INVERSE_DATA_TYPES[typecode], 0)]
+    probe.bytes_per_vertex  = attribute_size(typecode, column.shape[1])
+    probe.vertex_count      = len(column)
+    try:
+        decoded = probe.decode_vertices(probe.encode_vertices({index: column}, len(column)))[index]
+    except (ValueError, OverflowError):
+        return None
+    error = np.abs(decoded - column)
+    if not np.all(np.isfinite(error)):
+        return None
+    return float(error.max()) if error.size else 0.
+
+
+def choose_encoding(binary, index, column, typecode, normalised, tolerance):
+    """
+    Picks the smallest encoding of a floating-point attribute column whose
+    round-trip error is within 'tolerance', preferring the more accurate
+    encoding when two take up the same space. Falls back to the current
+    encoding if nothing smaller is accurate enough.
+    Returns the (typecode, normalised) pair and its error.
+    """
+    count = np.shape(column)[1]
+    current_size  = attribute_size(typecode, count)
+    current_error = measure_encoding_error(binary, index, column, typecode, normalised)
+    best = ((typecode, normalised), current_error)
+    best_key = (current_size, current_error)
+    for encoding in FLOAT_ENCODINGS:
+        if encoding == (typecode, normalised):
+            continue
+        if encoding[1] and not binary.SUPPORTS_NORMALISED_ATTRIBUTES:
+            continue
+        size = attribute_size(encoding[0], count)
+        if size > current_size:
+            continue
+        error = measure_encoding_error(binary, index, column, *encoding)
+        if error is None or error > tolerance:
+            continue
+        key = (size, error)
+        if best_key[1] is None or key < best_key:
+            best = (encoding, error)
+            best_key = key
+    return best
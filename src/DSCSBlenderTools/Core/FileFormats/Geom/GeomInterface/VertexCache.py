@@ -0,0 +1,130 @@
+import numpy as np
+
+
+# Tuning values for the vertex scores, from Tom Forsyth's
+# "Linear-Speed Vertex Cache Optimisation"
+CACHE_DECAY_POWER   = 1.5
+LAST_TRI_SCORE      = 0.75
+VALENCE_BOOST_SCALE = 2.0
+VALENCE_BOOST_POWER = 0.5
+
+
+def calculate_acmr(triangles, cache_size=32):
+    """
+    Returns the average cache miss ratio of a triangle list, i.e. the mean
+    number of vertices that miss a FIFO post-transform cache of 'cache_size'
+    entries per triangle. Lies between 0.5 for an ideal grid mesh and 3.
+    """
+    if not len(triangles):
+        return 0.
+    cache = []
+    cached = set()
+    misses = 0
+    for tri in triangles:
+        for v in tri:
+            if v not in cached:
+                misses += 1
+                cache.append(v)
+                cached.add(v)
+                if len(cache) > cache_size:
+                    cached.remove(cache.pop(0))
+    return misses / len(triangles)
+
+
+def _vertex_score(cache_position, remaining_triangles, cache_size):
+    if remaining_triangles == 0:
+        return -1.
+    score = 0.
+    if cache_position >= 0:
+        if cache_position < 3:
+            # The most recent triangle should not be re-used straight away,
+            # so that its vertices are not favoured over the rest of the cache
+            score = LAST_TRI_SCORE
+        else:
+            scaler = 1. / (cache_size - 3)
+            score = (1. - (cache_position - 3) * scaler) ** CACHE_DECAY_POWER
+    # Favour vertices with few triangles left, so that they are finished off
+    score += VALENCE_BOOST_SCALE * remaining_triangles ** -VALENCE_BOOST_POWER
+    return score
+
+
+def optimise_triangle_order(triangles, vertex_count, cache_size=32):
+    """
+    Reorders a triangle list for locality in the post-transform vertex
+    cache, using Forsyth's greedy algorithm with a simulated LRU cache of
+    'cache_size' entries. The triangles themselves are unchanged.
+    """
+    triangles = [tuple(tri) for tri in triangles]
+    vertex_triangles = [[] for _ in range(vertex_count)]
+    for i, tri in enumerate(triangles):
+        for v in tri:
+            vertex_triangles[v].append(i)
+
+    remaining      = [len(tris) for tris in vertex_triangles]
+    cache_position = [-1]*vertex_count
+    vertex_scores  = [_vertex_score(-1, r, cache_size) for r in remaining]
+    triangle_scores = [sum(vertex_scores[v] for v in tri) for tri in triangles]
+    added = [False]*len(triangles)
+
+    order = []
+    cache = []
+    best_triangle = None
+    first_unadded = 0
+    while len(order) < len(triangles):
+        # Fall back to the first unadded triangle if nothing in the cache is usable
+        if best_triangle is None:
+            while added[first_unadded]:
+                first_unadded += 1
+            best_triangle = first_unadded
+
+        added[best_triangle] = True
+        order.append(triangles[best_triangle])
+        tri = triangles[best_triangle]
+        for v in tri:
+            remaining[v] -= 1
+            vertex_triangles[v].remove(best_triangle)
+
+        # Move the triangle's vertices to the front of the LRU cache
+        cache = [*dict.fromkeys(tri), *(v for v in cache if v not in tri)]
+        evicted = cache[cache_size:]
+        cache = cache[:cache_size]
+        for v in evicted:
+            cache_position[v] = -1
+        for i, v in enumerate(cache):
+            cache_position[v] = i
+
+        # Rescore everything touched by the cache update, and pick the best
+        # triangle among those using a cached vertex
+        for v in [*cache, *evicted]:
+            score = _vertex_score(cache_position[v], remaining[v], cache_size)
+            delta = score - vertex_scores[v]
+            vertex_scores[v] = score
+            for t in vertex_triangles[v]:
+                triangle_scores[t] += delta
+
+        best_triangle = None
+        best_score = -1.
+        for v in cache:
+            for t in vertex_triangles[v]:
+                if triangle_scores[t] > best_score:
+                    best_triangle = t
+                    best_score = triangle_scores[t]
+    return order
+
+
+def first_use_vertex_order(triangles, vertex_count):
+    """
+    Returns the vertex indices in the order that the triangles first
+    reference them, followed by any unreferenced vertices, and the triangles
+    remapped onto that order as an (n, 3) array.
+    """
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    flat = triangles.ravel()
+    referenced, first_use = np.unique(flat, return_index=True)
+    used_order = referenced[np.argsort(first_use, kind="stable")]
+    unused     = np.setdiff1d(np.arange(vertex_count), referenced, assume_unique=True)
+    order = np.concatenate([used_order, unused])
+
+    remap = np.empty(vertex_count, dtype=np.int64)
+    remap[order] = np.arange(vertex_count)
+    return order, remap[triangles]
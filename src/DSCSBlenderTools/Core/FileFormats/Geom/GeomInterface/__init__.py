@@ -2,14 +2,25 @@ import copy
 import math
 import struct
 
-from ....serialization.BinaryTargets import OffsetTracker
+import numpy as np
+
 from ..GeomBinary import GeomBinaryDSCSOpenGL, GeomBinaryDSCSPS, GeomBinaryMegido72
 from ..GeomBinary.CameraBinary import CameraBinary
 from ..GeomBinary.LightBinary import LightBinary
-from ..GeomBinary.MeshBinary.Base import VertexAttributeBinary
+from ..GeomBinary.MeshBinary.Base import ATTRIBUTE_NAMES, AttributeTypes, PrimitiveTypes, VertexAttributeBinary
+from ..GeomBinary.MeshBinary.VertexBuffer import VertexBuffer
 from ..GeomBinary.MaterialBinary import MaterialBinary, ShaderUniformBinary, OpenGLSettingBinary
-from .IndexTypes import create_index_interface, Triangles
+from ....serialization.utils import ndarray_to_list
+from .IndexTypes import create_index_interface, create_smallest_triangle_interface, Triangles
 from .VertexAttributes import create_vertex_attribute_interface
+from .MatrixPalettes import MAX_MATRIX_PALETTE_SIZE, partition_by_palette
+from .Quantisation import attribute_size, choose_encoding
+from .VertexCache import calculate_acmr, optimise_triangle_order, first_use_vertex_order
+
+
+# Merged meshes are kept small enough to be indexed with 16-bit indices,
+# which are the only kind some platforms support
+MAX_MERGED_VERTEX_COUNT = 0x10000
 
 
 class GeomInterface:
@@ -30,13 +41,16 @@ class GeomInterface:
     }
 
 
-    def add_mesh(self, name_hash, flags, material_id, vertices, indices):
+    def add_mesh(self, name_hash, flags, material_id, vertices, indices, use_triangle_strips=False):
         m = Mesh()
         m.name_hash   = name_hash
         m.flags       = flags
         m.material_id = material_id
         m.vertices    = vertices
-        m.indices     = Triangles.from_triangles("auto", indices)
+        if use_triangle_strips:
+            m.indices = create_smallest_triangle_interface("auto", indices)
+        else:
+            m.indices = Triangles.from_triangles("auto", indices)
         m.vertex_attributes = None
         self.meshes.append(m)
         return m
@@ -94,11 +108,11 @@ class GeomInterface:
         return binary_class
 
     @classmethod
-    def from_file(cls, path, model_type, invalidate_binary_allowed = False):
+    def from_file(cls, path, model_type, invalidate_binary_allowed = False, validation="strict", processes=None):
         binary_class = cls.binary_type(model_type)
         
         binary = binary_class()
-        binary.read(path)
+        binary.read(path, validation=validation, processes=processes)
 
         # Keep this code around, we'll need it at some point
         # shader_files = [
@@ -121,6 +135,24 @@ class GeomInterface:
 
         return cls.from_binary(binary, invalidate_binary_allowed=invalidate_binary_allowed)
 
+    @classmethod
+    def probe_file(cls, path, model_type, validation="strict"):
+        """
+        Reads the mesh headers, materials and texture names of a geom file
+        without reading any vertex or index data.
+        The meshes of the returned interface have no vertices or indices, so it
+        is only suitable for inspecting the file, not for re-exporting it.
+        """
+        binary = cls.binary_type(model_type)()
+        binary.probe(path, validation=validation)
+
+        instance = cls()
+        instance.meshes     = [Mesh.from_binary_header(mb) for mb in binary.meshes]
+        instance.materials  = [Material.from_binary(mb) for mb in binary.materials]
+        instance.textures   = [t.rstrip(b'\x00').decode('utf8') for t in binary.textures]
+        instance.bounding_box_diagonal = binary.bounding_box_diagonal
+        return instance
+
     @classmethod
     def from_binary(cls, binary, invalidate_binary_allowed=False):
         instance = cls()
@@ -129,7 +161,7 @@ class GeomInterface:
         instance.textures   = [t.rstrip(b'\x00').decode('utf8') for t in binary.textures]
         instance.cameras    = binary.cameras
         instance.lights     = binary.lights
-        instance.ibpms      = binary.ibpms
+        instance.ibpms      = ndarray_to_list(binary.ibpms)
         instance.extra_clut = binary.extra_clut
         instance.bounding_box_diagonal = binary.bounding_box_diagonal
         return instance
@@ -138,6 +170,62 @@ class GeomInterface:
         binary = self.to_binary(model_type, invalidate_self_allowed)
         binary.write(filepath)
 
+    def quantise_vertex_attributes(self, model_type, tolerance):
+        """
+        Picks the smallest encoding for the floating-point vertex attributes of
+        every mesh whose round-trip error stays within 'tolerance'.
+        Returns the total number of VAO bytes saved, and the largest error of
+        each attribute over all meshes.
+        """
+        mesh_type = self.binary_type(model_type)().MESH_TYPE
+        bytes_saved = 0
+        max_errors  = {}
+        for mesh in self.meshes:
+            mesh_bytes_saved, errors = mesh.quantise_vertex_attributes(mesh_type, tolerance)
+            bytes_saved += mesh_bytes_saved
+            for name, error in errors.items():
+                max_errors[name] = max(max_errors.get(name, 0.), error)
+        return bytes_saved, max_errors
+
+    def merge_meshes(self, max_palette_size=MAX_MATRIX_PALETTE_SIZE):
+        """
+        Merges meshes that share a material, flags and vertex layout into
+        single draw calls, as long as each merged mesh references at most
+        'max_palette_size' bones and can still be indexed with 16-bit indices.
+        Each merged mesh takes the name hash of, and is drawn in the place of,
+        the first mesh merged into it.
+        Returns the number of meshes afterwards.
+        """
+        groups = {}
+        batches = []
+        for i, mesh in enumerate(self.meshes):
+            key = mesh.merge_key()
+            if key is None or len(mesh.bones_used()) > max_palette_size:
+                batches.append([i])
+            else:
+                groups.setdefault(key, []).append(i)
+
+        for members in groups.values():
+            bone_sets = [self.meshes[i].bones_used() for i in members]
+            for _, partition in partition_by_palette(bone_sets, max_palette_size):
+                # Start a new mesh whenever the vertices would overflow the indices
+                batch = []
+                batch_vertex_count = 0
+                for i in (members[j] for j in partition):
+                    vertex_count = len(self.meshes[i].vertices)
+                    if len(batch) and batch_vertex_count + vertex_count > MAX_MERGED_VERTEX_COUNT:
+                        batches.append(batch)
+                        batch = []
+                        batch_vertex_count = 0
+                    batch.append(i)
+                    batch_vertex_count += vertex_count
+                batches.append(batch)
+
+        batches.sort(key=lambda batch: batch[0])
+        self.meshes = [Mesh.concatenate([self.meshes[i] for i in batch]) if len(batch) > 1 else self.meshes[batch[0]]
+                       for batch in batches]
+        return len(self.meshes)
+
     def to_binary(self, model_type, invalidate_self_allowed=False):
         binary_class = self.binary_type(model_type)
 
@@ -160,40 +248,16 @@ class GeomInterface:
         # Geometry
         vmeshes = [m for m in binary.meshes if m.vertex_count]
         if len(vmeshes):
-            maximum_coord = [c + d for c, d in zip(vmeshes[0].centre_point, vmeshes[0].bounding_box_diagonal)]
-            minimum_coord = [c - d for c, d in zip(vmeshes[0].centre_point, vmeshes[0].bounding_box_diagonal)]
-            for mesh in vmeshes[1:]:
-                for idx in range(3):
-                    maximum_coord[idx] = mesh.centre_point[idx] + mesh.bounding_box_diagonal[idx]
-                    minimum_coord[idx] = mesh.centre_point[idx] - mesh.bounding_box_diagonal[idx]
-            binary.centre_point          = [(mx + mn) / 2 for mx, mn in zip(maximum_coord, minimum_coord)]
-            binary.bounding_box_diagonal = [(mx - mn) / 2 for mx, mn in zip(maximum_coord, minimum_coord)]
+            centres   = np.array([m.centre_point          for m in vmeshes], dtype=np.float64)
+            diagonals = np.array([m.bounding_box_diagonal for m in vmeshes], dtype=np.float64)
+            maximum_coord = (centres + diagonals).max(axis=0)
+            minimum_coord = (centres - diagonals).min(axis=0)
+            binary.centre_point          = ((maximum_coord + minimum_coord) / 2).tolist()
+            binary.bounding_box_diagonal = ((maximum_coord - minimum_coord) / 2).tolist()
         else:
             binary.centre_point = [0., 0., 0.]
             binary.bounding_box_diagonal = [0., 0., 0.]
 
-        # Offsets
-        ot = OffsetTracker()
-        ot.rw_obj_method(binary, binary.rw_header)
-        if binary.mesh_count:
-            binary.meshes_offset = ot.tell()
-            ot.rw_obj_array(binary.meshes, binary.MESH_TYPE, binary.mesh_count)
-            for mesh in binary.meshes:
-                mesh.vertices_offset          = ot.tell() if mesh.vertex_count            else 0; ot.rw_obj_method(mesh, mesh.rw_VAO)
-                mesh.matrix_palette_offset    = ot.tell() if mesh.matrix_palette_count    else 0; ot.rw_obj_method(mesh, mesh.rw_matrix_palette)
-                mesh.indices_offset           = ot.tell() if mesh.index_count             else 0; ot.rw_obj_method(mesh, mesh.rw_IBO)
-                ot.align(ot.local_tell(), 0x04)
-                mesh.vertex_attributes_offset = ot.tell() if mesh.vertex_attribute_count  else 0; ot.rw_obj_method(mesh, mesh.rw_vertex_attributes)
-        else:
-            binary.meshes_offset = 0
-
-        binary.materials_offset     = ot.tell() if binary.material_count         else 0; ot.rw_obj_method(binary, binary.rw_materials)
-        binary.textures_offset      = ot.tell() if binary.texture_section_size   else 0; ot.rw_obj_method(binary, binary.rw_textures)
-        binary.light_sources_offset = ot.tell() if binary.light_source_count     else 0; ot.rw_obj_method(binary, binary.rw_lights)
-        binary.cameras_offset       = ot.tell() if binary.camera_count           else 0; ot.rw_obj_method(binary, binary.rw_cameras)
-        ot.align(ot.local_tell(), 0x10)
-        binary.ibpms_offset         = ot.tell() if binary.ibpm_count             else 0; ot.rw_obj_method(binary, binary.rw_ibpms)
-        binary.extra_clut_offset    = ot.tell() if binary.extra_clut is not None else 0; ot.rw_obj_method(binary, binary.rw_extra_clut)
         return binary
 
 
@@ -202,26 +266,211 @@ class Mesh:
         self.name_hash   = None
         self.flags       = None
         self.material_id = None
-        self.vertices    = None
+        self.vertices    = VertexBuffer()
         self.indices     = None
         self.vertex_attributes = []
+        self.attribute_encodings = {}  # Attribute index -> (typecode, normalised) overriding the packed type
+
+    @property
+    def vertices(self):
+        return self.__vertices
+
+    @vertices.setter
+    def vertices(self, value):
+        # Lists of Vertex objects are converted to columnar storage
+        if not isinstance(value, VertexBuffer):
+            value = VertexBuffer.from_vertices(value)
+        self.__vertices = value
 
     @classmethod
-    def from_binary(cls, binary, invalidate_binary_allowed=False):
+    def from_binary_header(cls, binary):
         instance = cls()
         instance.name_hash   = binary.name_hash
         instance.flags       = binary.flags
         instance.material_id = binary.material_id
-        instance.vertices, vas = cls.__from_binary_vertices(binary, invalidate_binary_allowed)
+        return instance
+
+    @classmethod
+    def from_binary(cls, binary, invalidate_binary_allowed=False):
+        instance = cls.from_binary_header(binary)
+        vertices, vas = cls.__from_binary_vertices(binary, invalidate_binary_allowed)
+        instance.vertices = vertices
 
         ptype = binary.PRIMITIVE_TYPES[binary.primitive_type]
         dtype = binary.DATA_TYPES[binary.index_type]
-        instance.indices     = create_index_interface(ptype, dtype, binary.IBO)
+        instance.indices     = create_index_interface(ptype, dtype, ndarray_to_list(binary.IBO))
 
         # Going to get rid of this anyway
         instance.vertex_attributes = None#[create_vertex_attribute_interface(va, binary.DATA_TYPES) for va in vas]
         return instance
 
+    def optimise_vertex_cache(self, cache_size=32):
+        """
+        Reorders the triangles for locality in the post-transform vertex
+        cache, and then the vertices into the order the triangles first use
+        them. The set of triangles is unchanged.
+        Returns the average cache miss ratio before and after.
+        """
+        triangles = self.__get_triangles()
+        acmr_before = calculate_acmr(triangles, cache_size)
+        triangles = optimise_triangle_order(triangles, len(self.vertices), cache_size)
+        order, triangles = first_use_vertex_order(triangles, len(self.vertices))
+        triangles = triangles.tolist()
+        acmr_after = calculate_acmr(triangles, cache_size)
+
+        self.vertices = self.vertices.take(order)
+        self.indices  = self.__create_triangle_indices(triangles)
+        return acmr_before, acmr_after
+
+    @classmethod
+    def concatenate(cls, meshes):
+        """
+        Creates a single mesh holding the vertices and triangles of all of
+        'meshes', which must have the same vertex layout. The name hash,
+        flags, material and vertex attributes are taken from the first mesh.
+        """
+        first = meshes[0]
+        vertex_counts = [len(m.vertices) for m in meshes]
+        vertices      = VertexBuffer.concatenate([m.vertices for m in meshes])
+
+        offsets   = np.cumsum([0, *vertex_counts[:-1]])
+        triangles = np.concatenate([np.asarray(m.__get_triangles(), dtype=np.int64).reshape(-1, 3) + offset
+                                    for m, offset in zip(meshes, offsets)]).tolist()
+        data_types = {m.indices.data_type for m in meshes}
+        data_type  = data_types.pop() if len(data_types) == 1 else "auto"
+
+        instance = cls()
+        instance.name_hash   = first.name_hash
+        instance.flags       = first.flags
+        instance.material_id = first.material_id
+        instance.vertices    = vertices
+        if all(m.indices.primitive_type == PrimitiveTypes.TRIANGLES for m in meshes):
+            instance.indices = Triangles.from_triangles(data_type, triangles)
+        else:
+            instance.indices = create_smallest_triangle_interface(data_type, triangles)
+        instance.vertex_attributes   = copy.deepcopy(first.vertex_attributes)
+        instance.attribute_encodings = dict(first.attribute_encodings)
+        return instance
+
+    def merge_key(self):
+        """
+        Returns a key that is equal for meshes that can be drawn with the same
+        draw call, or None if the mesh cannot be merged with any other.
+        """
+        if self.indices is None or self.indices.primitive_type not in (PrimitiveTypes.TRIANGLES, PrimitiveTypes.TRIANGLE_STRIP):
+            return None
+        layout = tuple((attr, column.dtype.str, column.shape[1]) for attr, column in sorted(self.vertices.columns.items()))
+        vertex_attributes = None if self.vertex_attributes is None else tuple(repr(va) for va in self.vertex_attributes)
+        return (self.material_id, self.flags, layout, vertex_attributes, tuple(sorted(self.attribute_encodings.items())))
+
+    def bones_used(self):
+        """
+        Returns the set of bone indices referenced by the vertices.
+        """
+        if not self.vertices.has_attribute(AttributeTypes.INDEX):
+            return set()
+        indices = self.vertices.column(AttributeTypes.INDEX).astype(np.int64)
+        return set(np.unique(indices[self.vertices.element_mask(AttributeTypes.INDEX)]).tolist())
+
+    def weld_vertices(self):
+        """
+        Merges vertices whose attributes are bit-identical, keeping the first
+        occurrence of each, and remaps the indices onto the remaining
+        vertices. The primitive type of the indices is unchanged.
+        Returns the number of vertices removed.
+        """
+        count = len(self.vertices)
+        _, first_use, inverse = np.unique(self.vertices.packed_rows(), return_index=True, return_inverse=True)
+        if len(first_use) == count:
+            return 0
+
+        # Keep the surviving vertices in their original order
+        order = np.argsort(first_use, kind="stable")
+        remap = np.empty(len(order), dtype=np.int64)
+        remap[order] = np.arange(len(order))
+        remap = remap[inverse.reshape(-1)]
+
+        buffer = remap[np.asarray(self.indices.buffer, dtype=np.int64)].tolist()
+        self.vertices = self.vertices.take(first_use[order])
+        self.indices  = create_index_interface(self.indices.primitive_type, self.indices.data_type, buffer)
+        return count - len(order)
+
+    def partition_by_matrix_palette(self, max_palette_size=MAX_MATRIX_PALETTE_SIZE):
+        """
+        Splits the mesh into as few meshes as possible whose vertices each
+        reference at most 'max_palette_size' bones. Only vertices used by
+        triangles in more than one of the new meshes are duplicated.
+        Returns the list of new meshes, or a list containing only this mesh if
+        it already fits in a single matrix palette.
+        """
+        if not self.vertices.has_attribute(AttributeTypes.INDEX):
+            return [self]
+        indices    = self.vertices.column(AttributeTypes.INDEX).astype(np.int64)
+        index_mask = self.vertices.element_mask(AttributeTypes.INDEX)
+        if len(np.unique(indices[index_mask])) <= max_palette_size:
+            return [self]
+
+        vertex_bones = [set(row[mask].tolist()) for row, mask in zip(indices, index_mask)]
+        triangles = np.asarray(self.__get_triangles(), dtype=np.int64).reshape(-1, 3)
+        bone_sets = [vertex_bones[v1] | vertex_bones[v2] | vertex_bones[v3] for v1, v2, v3 in triangles.tolist()]
+
+        meshes = []
+        for _, triangle_indices in partition_by_palette(bone_sets, max_palette_size):
+            used_vertices, remapped = np.unique(triangles[triangle_indices], return_inverse=True)
+            m = Mesh()
+            m.name_hash   = self.name_hash
+            m.flags       = self.flags
+            m.material_id = self.material_id
+            m.vertices    = self.vertices.take(used_vertices)
+            m.indices     = self.__create_triangle_indices(remapped.reshape(-1, 3).tolist())
+            m.vertex_attributes = copy.deepcopy(self.vertex_attributes)
+            meshes.append(m)
+        return meshes
+
+    def quantise_vertex_attributes(self, ctor, tolerance):
+        """
+        Picks the smallest encoding for each floating-point vertex attribute
+        whose round-trip error stays within 'tolerance', and records it in
+        'attribute_encodings' for 'to_binary' to use. Errors are measured on
+        the values as they are stored, i.e. after any shader transforms.
+        Returns the number of VAO bytes saved, and the error of each attribute.
+        """
+        self.attribute_encodings = {}
+        binary = self.to_binary(ctor)
+
+        bytes_saved = 0
+        errors = {}
+        for vab in binary.vertex_attributes:
+            typecode = binary.DATA_TYPES[vab.type]
+            if typecode not in ('f', 'e') or vab.normalised or vab.index in binary.VAO.masks:
+                continue
+            column = binary.VAO.column(vab.index)
+            (new_typecode, normalised), error = choose_encoding(binary, vab.index, column, typecode, vab.normalised, tolerance)
+            if error is None:
+                continue
+            if (new_typecode, normalised) != (typecode, vab.normalised):
+                self.attribute_encodings[vab.index] = (new_typecode, normalised)
+                size_change = attribute_size(typecode, vab.elem_count) - attribute_size(new_typecode, vab.elem_count)
+                bytes_saved += size_change*binary.vertex_count
+            errors[ATTRIBUTE_NAMES.get(vab.index, f"attribute_{vab.index}")] = error
+        return bytes_saved, errors
+
+    def __get_triangles(self):
+        primitive_type = self.indices.primitive_type
+        if primitive_type == PrimitiveTypes.TRIANGLES:
+            return self.indices.unpack().tolist()
+        elif primitive_type == PrimitiveTypes.TRIANGLE_STRIP:
+            return self.indices.to_triangles().unpack().tolist()
+        else:
+            raise NotImplementedError(f"Expected a triangle primitive type, but the mesh uses primitive type '{primitive_type}'")
+
+    def __create_triangle_indices(self, triangles):
+        # Triangle strips are rebuilt, and kept only if still smaller than a list
+        if self.indices.primitive_type == PrimitiveTypes.TRIANGLES:
+            return Triangles.from_triangles(self.indices.data_type, triangles)
+        else:
+            return create_smallest_triangle_interface(self.indices.data_type, triangles)
+
     def to_binary(self, ctor, invalidate_self_allowed=False):
         binary = ctor()
 
@@ -265,27 +514,20 @@ class Mesh:
         binary.index_count = 0 if binary.IBO is None else len(binary.IBO)
 
         # Calculate geometry variables
+        # The box and the sphere share the centre point in the file format, so
+        # the tightest sphere that can be stored is the one about the box centre
         if len(self.vertices):
-            maximum_dims = [self.vertices[0].position[0], self.vertices[0].position[1], self.vertices[0].position[2]]
-            minimum_dims = [self.vertices[0].position[0], self.vertices[0].position[1], self.vertices[0].position[2]]
-            for v in self.vertices[1:]:
-                for idx in range(3):
-                    maximum_dims[idx] = max(maximum_dims[idx], v.position[idx])
-                    minimum_dims[idx] = min(minimum_dims[idx], v.position[idx])
-            binary.bounding_box_diagonal = [(mx - mn) / 2 for mx, mn in zip(maximum_dims, minimum_dims)]
-            binary.centre_point          = [(mx + mn) / 2 for mx, mn in zip(maximum_dims, minimum_dims)]
-
-            maximum_distance = 0.
-            centre = binary.centre_point
-            for v in self.vertices:
-                pos = v.position
-                radial_distance = sum([(p - c)**2 for p, c in zip(pos, centre)])
-                maximum_distance = max(maximum_distance, radial_distance)
-            binary.bounding_sphere_radius = maximum_distance**.5
+            positions = np.asarray(self.vertices.column(AttributeTypes.POSITION), dtype=np.float64)[:, :3]
+            maximum_dims = positions.max(axis=0)
+            minimum_dims = positions.min(axis=0)
+            centre = (maximum_dims + minimum_dims) / 2
+            binary.bounding_box_diagonal  = ((maximum_dims - minimum_dims) / 2).tolist()
+            binary.centre_point           = centre.tolist()
+            binary.bounding_sphere_radius = float(np.sqrt(((positions - centre)**2).sum(axis=1).max()))
         else:
             binary.centre_point           = [0., 0., 0.]
             binary.bounding_box_diagonal  = [0., 0., 0.]
-            binary.bounding_sphere_radius = [0., 0., 0.]
+            binary.bounding_sphere_radius = 0.
 
         # Deal with offsets later
 
@@ -293,21 +535,22 @@ class Mesh:
 
     @staticmethod
     def __from_binary_vertices(binary, invalidate_binary_allowed=False):
+        # Only the columns that get modified are copied
         if invalidate_binary_allowed:
             vertices   = binary.VAO
             attributes = binary.vertex_attributes
         else:
-            vertices   = copy.deepcopy(binary.VAO)
+            vertices   = binary.VAO.copy()
             attributes = copy.deepcopy(binary.vertex_attributes)
         binary.apply_shader_transforms_unpack(vertices, {va.index: va for va in attributes})
 
         if binary.vertex_groups_per_vertex == 0:
-            for v in vertices:
-                v.indices = [0]
-                v.weights = [1.0]
-        if vertices[0].weights is not None:
-            for v in vertices:
-                v.indices = [(binary.matrix_palette[idx // 3]) for idx in v.indices]
+            vertices.set_column(AttributeTypes.INDEX,  np.zeros((len(vertices), 1), dtype=np.int64))
+            vertices.set_column(AttributeTypes.WEIGHT, np.ones ((len(vertices), 1)))
+        if vertices.has_attribute(AttributeTypes.WEIGHT):
+            palette = np.asarray(binary.matrix_palette, dtype=np.int64)
+            indices = vertices.column(AttributeTypes.INDEX)
+            vertices.set_column(AttributeTypes.INDEX, palette[(indices // 3).astype(np.int64)])
 
         return vertices, attributes
 
@@ -320,36 +563,40 @@ class Mesh:
             vertices   = self.vertices
             attributes = self.vertex_attributes
         else:
-            vertices   = copy.deepcopy(self.vertices)
+            vertices   = self.vertices.copy()
             attributes = copy.deepcopy(self.vertex_attributes)
         
         # Deal with position / weights
-        weights_used = set(v.weights is not None and len(v.weights) > 0 for v in vertices)
+        if vertices.has_attribute(AttributeTypes.WEIGHT):
+            weight_mask = vertices.element_mask(AttributeTypes.WEIGHT)
+            weight_counts = weight_mask.sum(axis=1)
+        else:
+            weight_counts = np.zeros(len(vertices), dtype=np.int64)
+        weights_used = set((weight_counts > 0).tolist())
         if len(weights_used) > 1:
             raise ValueError("Vertices have inconsistent numbers of weights")
         if list(weights_used)[0]:
-            used_indices = set()
-            max_weights = 0
-            for v in vertices:
-                used_indices.update(set(v.indices))
-                max_weights = max(max_weights, len(v.weights))
+            index_mask   = vertices.element_mask(AttributeTypes.INDEX)
+            indices      = vertices.column(AttributeTypes.INDEX).astype(np.int64)
+            used_indices = np.unique(indices[index_mask]).tolist()
+            max_weights  = int(weight_counts.max())
             
             if len(used_indices) == 1:
                 # Need to think carefully about how to generate the vertex attributes
                 binary.vertex_groups_per_vertex = 0
-                binary.matrix_palette = list(used_indices)
-                for v in vertices:
-                    v.indices = None
-                    v.weights = None
+                binary.matrix_palette = used_indices
+                vertices.remove_attribute(AttributeTypes.INDEX)
+                vertices.remove_attribute(AttributeTypes.WEIGHT)
             else:
                 binary.vertex_groups_per_vertex = max_weights
-                binary.matrix_palette = sorted(used_indices)
-                idx_lookup = {idx: i*3 for i, idx in enumerate(binary.matrix_palette)}
-                for v in vertices:
-                    v.indices = [idx_lookup[w] for w in v.indices]
-                    v.weights = list(v.weights)
-                    v.indices += [0  for _ in range(max_weights - len(v.weights))]
-                    v.weights += [0. for _ in range(max_weights - len(v.weights))]
+                binary.matrix_palette = used_indices
+                # Scatter the palette positions into a lookup table, then gather through it
+                idx_lookup = np.zeros(used_indices[-1] + 1, dtype=np.int64)
+                idx_lookup[used_indices] = np.arange(len(used_indices))*3
+                indices = np.where(index_mask, idx_lookup[np.where(index_mask, indices, 0)], 0)
+                weights = np.where(weight_mask, vertices.column(AttributeTypes.WEIGHT), 0.)
+                vertices.set_column(AttributeTypes.INDEX,  indices[:, :max_weights])
+                vertices.set_column(AttributeTypes.WEIGHT, weights[:, :max_weights])
 
         # Create vertex attributes
         if attributes is None:
@@ -363,6 +610,10 @@ class Mesh:
             
         # Edit vertices & attributes according to shader transforms
         binary.apply_shader_transforms_pack(vertices, vas)
+        for index, (typecode, normalised) in self.attribute_encodings.items():
+            if index in vas:
+                vas[index].type       = typecode
+                vas[index].normalised = normalised
         
         # Give Vertex Attributes to mesh binary
         INVERSE_DATA_TYPES = binary.INVERSE_DATA_TYPES
@@ -396,7 +647,7 @@ class Material:
         instance = cls()
         instance.name_hash = binary.name_hash
         instance.flags = binary.flags
-        instance.shader_file = binary.shader_hex
+        instance.shader_file = ndarray_to_list(binary.shader_hex)
         instance.shader_uniforms = [ShaderUniform.from_binary(b) for b in binary.shader_uniforms]
         instance.opengl_settings = [OpenGLSetting.from_binary(b) for b in binary.opengl_settings]
         return instance
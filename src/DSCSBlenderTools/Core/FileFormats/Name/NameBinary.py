@@ -36,33 +36,11 @@ class NameBinary(Serializable):
 
     def rw_names(self, rw):
         if len(self.pointers):
-            # Check we're in the right place, init the variable holders if necessary
+            # Check we're in the right place
             rw.assert_file_pointer_now_at("Start of pointers", self.pointers[0])
-            if rw.mode() == "read":
-                self.bone_names     = [None for _ in range(self.bone_name_count)]
-                self.material_names = [None for _ in range(self.material_name_count)]
 
-            # Calculate how big each string we're going to read/write is
-            sizes = [None for _ in range(len(self.pointers) + 1)]
-            for i, (p1, p2) in enumerate(zip(self.pointers, self.pointers[1:])):
-                sizes[i] = p2 - p1
-
-            # Calculate the length of the final string
-            if rw.mode() == "read":
-                curpos = rw.tell()
-                rw.seek(0, 2) # Seek to EOF
-                remaining_size = rw.tell() - curpos
-                rw.seek(curpos, 0) # Seek back to start
-                sizes[-1] = remaining_size
-            else:
-                if len(self.material_names):
-                    sizes[-1] = len(self.material_names[-1])
-                elif len(self.bone_names):
-                    sizes[-1] = len(self.bone_names[-1])
-
-            # Now read/write as appropriate
-            sizes = iter(sizes)
-            for i in range(self.bone_name_count):
-                self.bone_names[i] = rw.rw_str(self.bone_names[i], next(sizes))
-            for i in range(self.material_name_count):
-                self.material_names[i] = rw.rw_str(self.material_names[i], next(sizes))
+            # The names are a single block of characters, split at the pointers,
+            # with the final name running to the end of the file
+            names = rw.rw_pointed_strs(self.bone_names + self.material_names, self.pointers)
+            self.bone_names     = names[:self.bone_name_count]
+            self.material_names = names[self.bone_name_count:]
@@ -7,9 +7,9 @@ class NameInterface:
         self.material_names = []
 
     @classmethod
-    def from_file(cls, filepath):
+    def from_file(cls, filepath, validation="strict"):
         nf = NameBinary()
-        nf.read(filepath)
+        nf.read(filepath, validation=validation)
         return cls.from_binary(nf)
 
     @classmethod
@@ -1,6 +1,6 @@
 import array
 
-from ...serialization.Serializable import Serializable
+from ...serialization.Serializable import Serializable, Field, FieldLayout
 
 
 class PhysBinary(Serializable):
@@ -71,6 +71,16 @@ class PhysBinary(Serializable):
         
 
 class Ragdoll(Serializable):
+    RECORD_LAYOUT = FieldLayout([
+        Field("position",          'f', 3),
+        Field("scaled_quaternion", 'f', 4),
+        Field("unknown_vec3",      'f', 3),
+        Field("unknown_float",     'f'),
+        Field("collider_id",       'I'),
+        Field("is_solid",          'I'),
+        Field("ragdoll_name",      's', 0x18),
+    ])
+
     def __init__(self):
         super().__init__()
         self.context.endianness = '<'
@@ -89,13 +99,7 @@ class Ragdoll(Serializable):
         self.ragdoll_name  = None
 
     def read_write(self, rw):
-        self.position          = rw.rw_float32s(self.position, 3)
-        self.scaled_quaternion = rw.rw_float32s(self.scaled_quaternion, 4)
-        self.unknown_vec3      = rw.rw_float32s(self.unknown_vec3, 3)
-        self.unknown_float     = rw.rw_float32(self.unknown_float)
-        self.collider_id       = rw.rw_uint32(self.collider_id)
-        self.is_solid          = rw.rw_uint32(self.is_solid)
-        self.ragdoll_name      = rw.rw_bytestring(self.ragdoll_name, 0x18)
+        rw.rw_layout(self, self.RECORD_LAYOUT)
         
 
 
@@ -150,6 +154,9 @@ class BoxCollider(Serializable):
         return start_offset + 0x10 + 0x08
 
 class ComplexCollider(Serializable):
+    # Attributes filled in by rw_geometry, which may be parsed lazily
+    GEOMETRY_ATTRIBUTES = ("triangle_indices", "vertex_positions", "submesh_material_indices", "submesh_bone_indices")
+
     def __init__(self):
         super().__init__()
         self.context.endianness = '<'
@@ -172,7 +179,10 @@ class ComplexCollider(Serializable):
         self.submesh_bone_indices     = None
 
     def read_write(self, rw):
-        # Header
+        self.rw_header(rw)
+        rw.rw_lazy_obj_method(self, self.rw_geometry, self.GEOMETRY_ATTRIBUTES)
+
+    def rw_header(self, rw):
         self.vertex_count                    = rw.rw_uint32(self.vertex_count)
         self.triangle_count                  = rw.rw_uint32(self.triangle_count)
         self.first_vertex_copy_1             = rw.rw_float32s(self.first_vertex_copy_1, 3)
@@ -183,7 +193,7 @@ class ComplexCollider(Serializable):
         self.submesh_material_indices_offset = rw.rw_uint64(self.submesh_material_indices_offset)
         self.submesh_bone_indices_offset     = rw.rw_uint64(self.submesh_bone_indices_offset)
 
-        # Data
+    def rw_geometry(self, rw):
         rw.assert_file_pointer_now_at("Triangles", self.triangles_offset)
         self.triangle_indices = rw.rw_uint32s(self.triangle_indices, (self.triangle_count, 3))
         
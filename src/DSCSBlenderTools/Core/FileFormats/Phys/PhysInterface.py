@@ -1,4 +1,5 @@
 from .PhysBinary import PhysBinary, Ragdoll, Collider, BoxCollider, ComplexCollider
+from ...serialization.utils import ndarray_to_list
 
 
 class PhysInterface:
@@ -24,9 +25,9 @@ class PhysInterface:
         self.colliders.append(c)
         
     @classmethod
-    def from_file(cls, filepath):
+    def from_file(cls, filepath, validation="strict"):
         binary = PhysBinary()
-        binary.read(filepath)
+        binary.read(filepath, validation=validation)
         return cls.from_binary(binary)
     
     def to_file(self, filepath):
@@ -201,11 +202,13 @@ class ComplexColliderInterface(ColliderInterface):
     def from_binary(cls, binary, phys_material_names, phys_bone_names):
         instance = cls()
         
-        used_materials = {idx: i for i, idx in enumerate(sorted(set(binary.submesh_material_indices)))}
-        used_bones     = {idx: i for i, idx in enumerate(sorted(set(binary.submesh_bone_indices)))}
+        submesh_material_indices = ndarray_to_list(binary.submesh_material_indices)
+        submesh_bone_indices     = ndarray_to_list(binary.submesh_bone_indices)
+        used_materials = {idx: i for i, idx in enumerate(sorted(set(submesh_material_indices)))}
+        used_bones     = {idx: i for i, idx in enumerate(sorted(set(submesh_bone_indices)))}
         
-        instance.vertices = binary.vertex_positions
-        for tri, mat_idx, bone_idx in zip(binary.triangle_indices, binary.submesh_material_indices, binary.submesh_bone_indices):
+        instance.vertices = ndarray_to_list(binary.vertex_positions)
+        for tri, mat_idx, bone_idx in zip(ndarray_to_list(binary.triangle_indices), submesh_material_indices, submesh_bone_indices):
             instance.triangles.append(Triangle(*tri, used_materials[mat_idx], used_bones[bone_idx]))
         instance.materials = [phys_material_names[idx].rstrip(b'\x00') for idx in used_materials]
         instance.bones     = [phys_bone_names    [idx].rstrip(b'\x00') for idx in used_bones]
@@ -252,14 +255,15 @@ class RagdollInterface:
 
     @classmethod
     def from_binary(cls, binary):
-        quat_magnitude = sum(e**2 for e in binary.scaled_quaternion)**.5
+        scaled_quaternion = ndarray_to_list(binary.scaled_quaternion)
+        quat_magnitude = sum(e**2 for e in scaled_quaternion)**.5
         
         instance = cls()
         instance.name_bytes    = binary.ragdoll_name.rstrip(b'\x00')
-        instance.position      = binary.position
-        instance.rotation      = [e/quat_magnitude for e in binary.scaled_quaternion]
+        instance.position      = ndarray_to_list(binary.position)
+        instance.rotation      = [e/quat_magnitude for e in scaled_quaternion]
         instance.scale         = quat_magnitude
-        instance.unknown_vec3  = binary.unknown_vec3
+        instance.unknown_vec3  = ndarray_to_list(binary.unknown_vec3)
         instance.unknown_float = binary.unknown_float
         instance.is_solid      = binary.is_solid
         
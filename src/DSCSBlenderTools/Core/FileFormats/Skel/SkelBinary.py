@@ -1,6 +1,6 @@
 import array
 
-from ...serialization.Serializable import Serializable
+from ...serialization.Serializable import Serializable, Field, FieldLayout
 
 
 class SkelBinary(Serializable):
@@ -39,6 +39,26 @@ class SkelBinary(Serializable):
     @property
     def FLOAT_CHANNEL_FLAGS_OFFSET_OFFSET        (self): return 0x2C
 
+    # Everything in the header after the filetype, which is checked first
+    HEADER_LAYOUT = FieldLayout([
+        # 0x04
+        Field("filesize",                           'Q'),
+        Field("hashes_section_bytecount",           'I'),
+
+        # 0x10
+        Field("bone_count",                         'H'),
+        Field("float_channel_count",                'H'),
+        Field("parent_bone_dataline_count",         'I'),
+        Field("bone_transforms_offset",             'I', offset="BONE_TRANSFORMS_OFFSET_OFFSET"),
+        Field("parent_bones_offset",                'I', offset="PARENT_BONES_OFFSET_OFFSET"),
+
+        # 0x20
+        Field("bone_name_hashes_offset",            'I', offset="BONE_NAME_HASHES_OFFSET_OFFSET"),
+        Field("float_channel_array_indices_offset", 'I', offset="FLOAT_CHANNEL_ARRAY_INDICES_OFFSET_OFFSET"),
+        Field("float_channel_name_hashes_offset",   'I', offset="FLOAT_CHANNEL_NAME_HASHES_OFFSET_OFFSET"),
+        Field("float_channel_flags_offset",         'I', offset="FLOAT_CHANNEL_FLAGS_OFFSET_OFFSET"),
+    ])
+
     def __init__(self):
         super().__init__()
 
@@ -67,7 +87,7 @@ class SkelBinary(Serializable):
         self.float_channel_object_name_hashes = None
 
     def read_write(self, rw):
-        self.rw_header(rw)
+        rw.rw_deferred_obj_method(self, self.rw_header)
         self.rw_parent_bone_datalines(rw)
         self.rw_bone_transforms(rw)
         self.rw_parent_bones(rw)
@@ -82,58 +102,53 @@ class SkelBinary(Serializable):
         self.filetype = rw.rw_bytestring(self.filetype, 4)
         if self.filetype != b"20SE":
             raise ValueError("Attempted to read a file that is not a valid skel file")
-        self.filesize                   = rw.rw_uint64(self.filesize)
-        self.hashes_section_bytecount   = rw.rw_uint32(self.hashes_section_bytecount)
-
-        # 0x10
-        self.bone_count                 = rw.rw_uint16(self.bone_count)
-        self.float_channel_count        = rw.rw_uint16(self.float_channel_count)
-        self.parent_bone_dataline_count = rw.rw_uint32(self.parent_bone_dataline_count)
-        self.bone_transforms_offset     = rw.rw_offset_uint32(self.bone_transforms_offset, self.BONE_TRANSFORMS_OFFSET_OFFSET)
-        self.parent_bones_offset        = rw.rw_offset_uint32(self.parent_bones_offset, self.PARENT_BONES_OFFSET_OFFSET)
-
-        # 0x20
-        self.bone_name_hashes_offset            = rw.rw_offset_uint32(self.bone_name_hashes_offset, self.BONE_NAME_HASHES_OFFSET_OFFSET)
-        self.float_channel_array_indices_offset = rw.rw_offset_uint32(self.float_channel_array_indices_offset, self.FLOAT_CHANNEL_ARRAY_INDICES_OFFSET_OFFSET)
-        self.float_channel_name_hashes_offset   = rw.rw_offset_uint32(self.float_channel_name_hashes_offset, self.FLOAT_CHANNEL_NAME_HASHES_OFFSET_OFFSET)
-        self.float_channel_flags_offset         = rw.rw_offset_uint32(self.float_channel_flags_offset, self.FLOAT_CHANNEL_FLAGS_OFFSET_OFFSET)
+        rw.rw_layout(self, self.HEADER_LAYOUT)
 
         # 0x30
         rw.align(0x30, 0x40)
 
-        if self.filesize != self.bone_name_hashes_offset + self.hashes_section_bytecount:
+        # Sizes are tied to the end of the file when writing, so can only be checked on read
+        if rw.mode() == "read" and self.filesize != self.bone_name_hashes_offset + self.hashes_section_bytecount:
             raise ValueError("Inconsistent file header; hashes section bytecount inconsistent with file size")
 
     def rw_parent_bone_datalines(self, rw):
         self.parent_bone_datalines = rw.rw_int16s(self.parent_bone_datalines, (self.parent_bone_dataline_count, 8))
 
     def rw_bone_transforms(self, rw):
+        self.bone_transforms_offset = rw.tie_to_offset(self.bone_transforms_offset)
         rw.assert_file_pointer_now_at("Bone Transforms", self.bone_transforms_offset)
         self.bone_transforms = rw.rw_obj_array(self.bone_transforms, BoneTransforms, self.bone_count)
 
     def rw_parent_bones(self, rw):
+        self.parent_bones_offset = rw.tie_to_offset(self.parent_bones_offset)
         rw.assert_file_pointer_now_at("Bone Parents", self.parent_bones_offset)
         self.parent_bones = rw.rw_int16s(self.parent_bones, self.bone_count)
 
     def rw_float_channel_flags(self, rw):
+        self.float_channel_flags_offset = rw.tie_to_offset(self.float_channel_flags_offset)
         rw.assert_file_pointer_now_at("Float Channel Flags", self.float_channel_flags_offset)
         self.float_channel_flags = rw.rw_uint8s(self.float_channel_flags, self.float_channel_count)
         rw.align(rw.tell(), 0x10)
 
     def rw_bone_name_hashes(self, rw):
+        self.bone_name_hashes_offset = rw.tie_to_offset(self.bone_name_hashes_offset)
         rw.assert_file_pointer_now_at("Bone Name Hashes", self.bone_name_hashes_offset)
         self.bone_name_hashes = rw.rw_uint32s(self.bone_name_hashes, self.bone_count)
 
     def rw_float_channel_array_indices(self, rw):
+        self.float_channel_array_indices_offset = rw.tie_to_offset(self.float_channel_array_indices_offset)
         rw.assert_file_pointer_now_at("Float Channel Array Indices", self.float_channel_array_indices_offset)
-
         self.float_channel_array_indices = rw.rw_uint32s(self.float_channel_array_indices, self.float_channel_count)
 
     def rw_float_channel_object_names(self, rw):
+        self.float_channel_name_hashes_offset = rw.tie_to_offset(self.float_channel_name_hashes_offset)
         rw.assert_file_pointer_now_at("Float Channel Object Names", self.float_channel_name_hashes_offset)
         self.float_channel_object_name_hashes = rw.rw_uint32s(self.float_channel_object_name_hashes, self.float_channel_count)
         rw.align(rw.tell(), 0x10)
 
+        self.filesize = rw.tie_to_offset(self.filesize)
+        self.hashes_section_bytecount = self.filesize - self.bone_name_hashes_offset
+
 
 class QuaternionBinary(Serializable):
     __slots__ = ("data",)
@@ -160,6 +175,13 @@ class QuaternionBinary(Serializable):
 class BoneTransforms(Serializable):
     __slots__ = ("quat", "pos", "scale")
 
+    # Only describes the record for bulk decoding; the quaternion is read into a QuaternionBinary
+    RECORD_LAYOUT = FieldLayout([
+        Field("quat",  'f', 4),
+        Field("pos",   'f', 4),
+        Field("scale", 'f', 4),
+    ])
+
     def __init__(self):
         super().__init__()
         self.quat  = QuaternionBinary()
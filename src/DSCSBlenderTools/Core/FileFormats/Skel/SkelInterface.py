@@ -1,5 +1,5 @@
 from .SkelBinary import SkelBinary, BoneTransforms
-from ...serialization.BinaryTargets import OffsetTracker
+from ...serialization.utils import ndarray_to_list
 import struct
 
 
@@ -17,9 +17,9 @@ class SkelInterface:
         return len(self.float_channels)
 
     @classmethod
-    def from_file(cls, path):
+    def from_file(cls, path, validation="strict"):
         sb = SkelBinary()
-        sb.read(path)
+        sb.read(path, validation=validation)
         return cls.from_binary(sb)
 
     def add_bone(self, name_hash, parent, flag, pos, quat, scale):
@@ -43,20 +43,22 @@ class SkelInterface:
     def from_binary(cls, sb):
         instance = cls()
         instance.bones = []
-        for name_hash, parent, transforms in zip(sb.bone_name_hashes, sb.parent_bones, sb.bone_transforms):
+        for name_hash, parent, transforms in zip(ndarray_to_list(sb.bone_name_hashes), ndarray_to_list(sb.parent_bones), sb.bone_transforms):
             b = Bone()
             b.name_hash = name_hash
             b.parent    = parent
-            b.quat      = transforms.quat.data
-            b.pos       = transforms.pos
-            b.scale     = transforms.scale
+            b.quat      = ndarray_to_list(transforms.quat.data)
+            b.pos       = ndarray_to_list(transforms.pos)
+            b.scale     = ndarray_to_list(transforms.scale)
             instance.bones.append(b)
 
-        for data_line in sb.parent_bone_datalines:
+        for data_line in ndarray_to_list(sb.parent_bone_datalines):
             for child, parent in zip(data_line[0::2], data_line[1::2]):
                 instance.bones[child].flag = (parent & 0x8000) >> 15
 
-        for name_hash, flags, index in zip(sb.float_channel_object_name_hashes, sb.float_channel_flags, sb.float_channel_array_indices):
+        for name_hash, flags, index in zip(ndarray_to_list(sb.float_channel_object_name_hashes),
+                                           ndarray_to_list(sb.float_channel_flags),
+                                           ndarray_to_list(sb.float_channel_array_indices)):
             fc = FloatChannel()
             fc.name_hash = name_hash
             fc.flags = flags
@@ -72,11 +74,6 @@ class SkelInterface:
     def to_binary(self):
         sb = SkelBinary()
 
-        # Temporarily set some variables to satisfy an internal consistency check
-        sb.filesize = 0
-        sb.bone_name_hashes_offset = 0
-        sb.hashes_section_bytecount = 0
-
         # Data
         sb.bone_name_hashes      = [b.name_hash for b in self.bones]
         sb.parent_bones          = [b.parent for b in self.bones]
@@ -93,27 +90,11 @@ class SkelInterface:
         sb.float_channel_array_indices      = [fc.array_index for fc in self.float_channels]
         sb.float_channel_object_name_hashes = [fc.name_hash for fc in self.float_channels]
 
-        # Offsets / Sizes
+        # Counts
         sb.bone_count = len(self.bones)
         sb.float_channel_count = len(self.float_channels)
         sb.parent_bone_dataline_count = len(sb.parent_bone_datalines)
 
-        ot = OffsetTracker()
-        ot.rw_obj_method(sb, sb.rw_header)
-        ot.rw_obj_method(sb, sb.rw_parent_bone_datalines)
-        sb.bone_transforms_offset             = ot.tell(); ot.rw_obj_method(sb, sb.rw_bone_transforms)
-        sb.parent_bones_offset                = ot.tell(); ot.rw_obj_method(sb, sb.rw_parent_bones)
-        sb.float_channel_flags_offset         = ot.tell(); ot.rw_obj_method(sb, sb.rw_float_channel_flags)
-
-        hashes_section_start = ot.tell()
-        sb.bone_name_hashes_offset            = ot.tell(); ot.rw_obj_method(sb, sb.rw_bone_name_hashes)
-        sb.float_channel_array_indices_offset = ot.tell(); ot.rw_obj_method(sb, sb.rw_float_channel_array_indices)
-        sb.float_channel_name_hashes_offset   = ot.tell(); ot.rw_obj_method(sb, sb.rw_float_channel_object_names)
-
-        # Counts
-        sb.filesize = ot.tell()
-        sb.hashes_section_bytecount = sb.filesize - hashes_section_start
-
         return sb
 
 
@@ -1,15 +1,108 @@
 import array
+import collections.abc
 import copy
+import mmap
 import struct
 
 from .utils import chunk_list, flatten_list
 
 
 class Context:
-    __slots__ = ("endianness")
+    __slots__ = ("endianness", "use_ndarrays")
 
     def __init__(self):
-        self.endianness = "<"
+        self.endianness   = "<"
+        self.use_ndarrays = False  # Return shaped numpy arrays from rw_multiple rather than nested lists
+
+
+class RecordArray(collections.abc.MutableSequence):
+    """
+    A sequence of fixed-size Serializable records, decoded in a single read
+    into the NumPy structured array 'records' using the RECORD_LAYOUT of the
+    element type. The element objects are only constructed, by running their
+    'read_write' over the stored bytes, when they are first accessed.
+    Elements that were never accessed are written back out from the stored
+    bytes. 'records' holds the data as it was read, and is not updated when
+    the element objects are modified.
+    If 'use_ndarrays' is set, the elements are constructed in ndarray mode,
+    as they would have been had they been read directly.
+    """
+    __slots__ = ("raw", "records", "obj_constructor", "validation", "use_ndarrays", "objects", "reader")
+
+    def __init__(self, raw, records, obj_constructor, validation="strict", use_ndarrays=False):
+        self.raw             = raw
+        self.records         = records
+        self.obj_constructor = obj_constructor
+        self.validation      = validation
+        self.use_ndarrays    = use_ndarrays
+        self.objects         = [None]*len(records)
+        self.reader          = None
+
+    def __repr__(self):
+        return f"[RecordArray] {self.obj_constructor.__name__} x{len(self)}"
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        obj = self.objects[idx]
+        if obj is None:
+            obj = self.materialise(idx)
+        return obj
+
+    def __setitem__(self, idx, value):
+        if isinstance(idx, slice):
+            self.detach()
+        self.objects[idx] = value
+
+    def __delitem__(self, idx):
+        self.detach()
+        del self.objects[idx]
+
+    def insert(self, idx, value):
+        self.detach()
+        self.objects.insert(idx, value)
+
+    def __getstate__(self):
+        # The reader wraps a memoryview, which cannot be pickled; it is
+        # recreated on the next access instead
+        return {name: getattr(self, name) for name in self.__slots__ if name != "reader"}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.reader = None
+
+    def __deepcopy__(self, memo):
+        instance = RecordArray(self.raw, self.records, self.obj_constructor, self.validation, self.use_ndarrays)
+        instance.objects = copy.deepcopy(self.objects, memo)
+        return instance
+
+    def materialise(self, idx):
+        idx %= len(self.objects)
+        if self.reader is None:
+            self.reader = BufferReader(None, self.raw, self.validation)
+            self.reader.context.use_ndarrays = self.use_ndarrays
+        obj = self.obj_constructor()
+        self.reader.seek(idx*self.records.itemsize)
+        self.reader.rw_obj(obj)
+        self.objects[idx] = obj
+        return obj
+
+    def detach(self):
+        """
+        Constructs every remaining element, after which the sequence no longer
+        relies on the stored bytes. Required before the length can change.
+        """
+        for i, obj in enumerate(self.objects):
+            if obj is None:
+                self.materialise(i)
+
+    def record_bytes(self, idx):
+        size = self.records.itemsize
+        return self.raw[idx*size:(idx+1)*size]
 
 
 class BinaryTargetBase:
@@ -66,18 +159,50 @@ class BinaryTargetBase:
         return self._rw_multiple(typecode, self.type_sizes[typecode], value, shape, endianness)
 
     def rw_obj(self, obj, *args, **kwargs):
-        previous_context = self.context
-        self.context = obj.context
+        previous_context = self.enter_context(obj)
         obj.read_write(self, *args, **kwargs)
         self.context = previous_context
         return obj
 
     def rw_obj_method(self, obj, method, *args, **kwargs):
-        previous_context = self.context
-        self.context = obj.context
+        previous_context = self.enter_context(obj)
         method(self, *args, **kwargs)
         self.context = previous_context
 
+    def enter_context(self, obj):
+        """
+        Switches to the context of 'obj', returning the previous context.
+        Objects operated on under an object using ndarrays are switched to
+        ndarrays too, so that the mode applies to the whole file.
+        """
+        previous_context = self.context
+        if previous_context.use_ndarrays:
+            obj.context.use_ndarrays = True
+        self.context = obj.context
+        return previous_context
+
+    def rw_deferred_obj_method(self, obj, method, *args, **kwargs):
+        """
+        Marks a fixed-size block, such as a header of offsets, that may be
+        written only once the rest of the file has been laid out.
+        Targets that do not need to defer anything execute it immediately.
+        """
+        self.rw_obj_method(obj, method, *args, **kwargs)
+
+    def rw_lazy_obj_method(self, obj, method, attributes, *args, **kwargs):
+        """
+        Marks a section that fills in 'attributes' of 'obj' and that may be
+        parsed on first access to one of them, rather than immediately.
+        Only the LazyReader defers these; everything else executes them now.
+        """
+        self.rw_obj_method(obj, method, *args, **kwargs)
+
+    @staticmethod
+    def _ndarray_dtype(typecode, endianness):
+        import numpy as np
+        # Standard sizes for struct's 'l' and 'L' are 4 bytes, unlike numpy's
+        return np.dtype(endianness + {'l': 'i', 'L': 'I', 'c': 'S1'}.get(typecode, typecode))
+
     def align_with(self, offset, alignment, typecode, value, endianness=None):
         if endianness is None:
             endianness = self.context.endianness
@@ -175,10 +300,10 @@ class BinaryTargetBase:
             raise Exception(
                 f"File pointer at {formatter(file_pointer_location)}, expected find {msg} with the pointer at {formatter(location)}.")
 
-    def tie_to_offset(self, value):
+    def tie_to_offset(self, value, condition=True):
         return value
 
-    def tie_to_local_offset(self, value):
+    def tie_to_local_offset(self, value, condition=True):
         return value
 
     ############################
@@ -220,6 +345,12 @@ class BinaryTargetBase:
     def rw_cstr(self, value, encoding='ascii'):
         raise NotImplementedError
 
+    def rw_cstrs(self, value, count, encoding='ascii', end_char=b"\x00"):
+        raise NotImplementedError
+
+    def rw_pointed_strs(self, value, pointers, end_pointer=None, encoding='ascii'):
+        raise NotImplementedError
+
     def rw_bytestring(self, value, count):
         raise NotImplementedError
 
@@ -238,6 +369,9 @@ class BinaryTargetBase:
     def rw_obj_array(self, value, obj_constructor, shape, validator=None):
         raise NotImplementedError
 
+    def rw_layout(self, obj, layout, endianness=None):
+        raise NotImplementedError
+
     def align(self, offset, alignment, padval=b'\x00'):
         raise NotImplementedError
 
@@ -249,13 +383,48 @@ class BinaryTargetBase:
 
 
 class Reader(BinaryTargetBase):
+    """
+    Reads values from a file stream. The 'validation' level controls how
+    much of the file is checked as it is read:
+        strict       - offsets, padding and expected values are all checked.
+        offsets-only - only the file pointer is checked against offsets.
+        trusted      - nothing is checked; for files already known to be good.
+    """
+    __slots__ = ("validation",)
+
     open_flags = "rb"
 
+    validation_levels = ("strict", "offsets-only", "trusted")
+
+    def __init__(self, filename, validation="strict"):
+        super().__init__(filename)
+        if validation not in self.validation_levels:
+            raise ValueError(f"Unknown validation level '{validation}', options are: {', '.join(self.validation_levels)}")
+        self.validation = validation
+
+    def _read(self, count=None):
+        return self.bytestream.read(count)
+
     def _handle_pads(self, count):
-        value = self.bytestream.read(count)
-        if value != b'\x00'*count:
+        value = self._read(count)
+        if self.validation == "strict" and value != b'\x00'*count:
             raise ValueError(f"Excepted padding bytes, but found {value}")
 
+    def assert_file_pointer_now_at(self, msg, location, file_pointer_location=None, use_hex=True):
+        if self.validation != "trusted":
+            super().assert_file_pointer_now_at(msg, location, file_pointer_location, use_hex)
+
+    def assert_local_file_pointer_now_at(self, msg, location, file_pointer_location=None, use_hex=True):
+        if self.validation != "trusted":
+            super().assert_local_file_pointer_now_at(msg, location, file_pointer_location, use_hex)
+
+    def assert_equal(self, data, check_value, formatter=lambda x: x):
+        if self.validation == "strict":
+            super().assert_equal(data, check_value, formatter)
+
+    def assert_is_zero(self, data):
+        self.assert_equal(data, 0)
+
     def rw_offset_uint32(self, value, offset, endianness=None):
         return self.rw_uint32(value, endianness) + offset
 
@@ -274,6 +443,12 @@ class Reader(BinaryTargetBase):
         for elem in shape:
             n_to_read *= elem
 
+        if self.context.use_ndarrays:
+            import numpy as np
+            dtype = self._ndarray_dtype(typecode, endianness)
+            data = np.frombuffer(bytearray(self.bytestream.read(size * n_to_read)), dtype=dtype, count=n_to_read)
+            return data.reshape(shape)
+
         if typecode == "e":
             arr_typecode = "f"
         else:
@@ -290,23 +465,57 @@ class Reader(BinaryTargetBase):
 
     def rw_str(self, value, length, encoding='ascii'):
         return self.bytestream.read(length).decode(encoding)
+
+    def rw_strs(self, value, length, count, encoding='ascii'):
+        return [s.decode(encoding) for s in self.rw_bytestrings(None, length, count)]
     
     def rw_cstr(self, value, encoding='ascii', end_char=b"\x00"):
-        out = b""
-        val = self.bytestream.read(1)
-        while (val != end_char and val != b''):
-            out += val
-            val = self.bytestream.read(1)
-        return out.decode(encoding)
+        return self.rw_cstrs(None, 1, encoding, end_char)[0]
+
+    def rw_cstrs(self, value, count, encoding='ascii', end_char=b"\x00", blocksize=0x100):
+        # Read in blocks and split on the terminator, rather than reading
+        # byte-by-byte, then step back over anything read past the last string
+        out = []
+        buffer = bytearray()
+        start = 0
+        while len(out) < count:
+            end = buffer.find(end_char, start)
+            if end == -1:
+                block = self.bytestream.read(blocksize)
+                if block == b'':
+                    # Hit EOF: any partial string is kept, and any further strings are empty
+                    out.append(buffer[start:].decode(encoding))
+                    out.extend("" for _ in range(count - len(out)))
+                    start = len(buffer)
+                    break
+                buffer += block
+                continue
+            out.append(buffer[start:end].decode(encoding))
+            start = end + len(end_char)
+        self.bytestream.seek(start - len(buffer), 1)
+        return out
+
+    def rw_pointed_strs(self, value, pointers, end_pointer=None, encoding='ascii'):
+        """
+        Reads a contiguous block of strings that is split by a list of pointers.
+        The final string runs to 'end_pointer', or to EOF if it is not given.
+        """
+        if not len(pointers):
+            return []
+        if end_pointer is None:
+            data = self.rw_unbounded_bytestring(None)
+        else:
+            data = self.rw_bytestring(None, end_pointer - pointers[0])
+        starts = [p - pointers[0] for p in pointers]
+        ends   = starts[1:] + [len(data)]
+        return [data[s:e].decode(encoding) for s, e in zip(starts, ends)]
 
     def rw_bytestring(self, value, count):
         return self.bytestream.read(count)
 
     def rw_bytestrings(self, value, count, shape):
-        out = [None]*shape
-        for i in range(shape):
-            out[i] = self.rw_bytestring(value, count)
-        return out
+        data = self.rw_bytestring(None, count*shape)
+        return [data[i:i + count] for i in range(0, count*shape, count)]
 
     def rw_unbounded_bytestring(self, value):
         return self.bytestream.read()
@@ -337,14 +546,20 @@ class Reader(BinaryTargetBase):
         return components
 
     def rw_s3Quats(self, value, shape, endianness=None):
+        from .CompressedQuaternions import decode_s3Quats
+
         if not hasattr(shape, "__getitem__"):
             shape = (shape,)
         n_to_read = 1
         for elem in shape:
             n_to_read *= elem
 
-        data = [self.rw_s3Quat(None, endianness) for _ in range(n_to_read)]
+        data, warnings = decode_s3Quats(self.rw_bytestring(None, 6*n_to_read))
+        warnings.report()
+        if self.context.use_ndarrays:
+            return data.reshape((*shape, 4))
 
+        data = data.tolist()
         for subshape in shape[1::][::-1]:
             data = chunk_list(data, subshape)
         return data
@@ -357,6 +572,8 @@ class Reader(BinaryTargetBase):
     def rw_obj_array(self, value, obj_constructor, shape, validator=None):
         if not hasattr(shape, "__getitem__"):
             shape = (shape,)
+        if len(shape) == 1 and validator is None and hasattr(obj_constructor, "RECORD_LAYOUT"):
+            return self.rw_record_array(obj_constructor, shape[0])
         n_to_read = 1
         for elem in shape:
             n_to_read *= elem
@@ -371,13 +588,34 @@ class Reader(BinaryTargetBase):
             data = chunk_list(data, subshape)
         return data
 
+    def rw_record_array(self, obj_constructor, count):
+        import numpy as np
+        layout     = obj_constructor.RECORD_LAYOUT
+        endianness = obj_constructor().context.endianness
+        raw        = self._read(layout.size * count)
+        records    = np.frombuffer(raw, dtype=layout.dtype(endianness), count=count)
+        if self.validation == "strict":
+            layout.validate_records(records, self)
+        return RecordArray(raw, records, obj_constructor, self.validation, self.context.use_ndarrays)
+
+    def rw_layout(self, obj, layout, endianness=None):
+        if endianness is None:
+            endianness = self.context.endianness
+        codec = layout.compile(endianness)
+        layout.assign(obj, codec.unpack(self.bytestream.read(codec.size)))
+        layout.validate(obj, self)
+        return obj
+
     def align(self, offset, alignment, padval=b'\x00'):
         n_to_read = (alignment - (offset % alignment)) % alignment
-        data = self.bytestream.read(n_to_read)
-        expected = padval * (len(data) // len(padval))
-        assert data == expected, f"Unexpected padding: Expected {expected}, read {data}."
+        data = self._read(n_to_read)
+        if self.validation == "strict":
+            expected = padval * (len(data) // len(padval))
+            assert data == expected, f"Unexpected padding: Expected {expected}, read {data}."
 
     def assert_at_eof(self):
+        if self.validation == "trusted":
+            return
         if (self.bytestream.read(1) != b''):
             raise Exception("Not at end of file!")
 
@@ -385,6 +623,190 @@ class Reader(BinaryTargetBase):
         return "read"
 
 
+class BufferReader(Reader):
+    """
+    A Reader that decodes directly out of a contiguous buffer with
+    'unpack_from' at a tracked offset, rather than issuing a stream read
+    per value. When used as a context manager the file is memory-mapped;
+    alternatively, any object supporting the buffer protocol can be passed
+    in as 'buffer'.
+    """
+    __slots__ = ("position", "mapped_file")
+
+    def __init__(self, filename, buffer=None, validation="strict"):
+        super().__init__(filename, validation)
+        self.position    = 0
+        self.mapped_file = None
+        if buffer is not None:
+            self.bytestream = memoryview(buffer).cast('B')
+
+    # Context managers are a decent approximation of RAII behaviour
+    def __enter__(self):
+        with open(self.filename, self.open_flags) as F:
+            try:
+                self.mapped_file = mmap.mmap(F.fileno(), 0, access=mmap.ACCESS_READ)
+                self.bytestream  = memoryview(self.mapped_file)
+            except ValueError:
+                # Empty files cannot be mapped
+                self.bytestream = memoryview(F.read())
+        self.position = 0
+        return self
+
+    def __exit__(self, exc_type, exc_val, traceback):
+        self.bytestream.release()
+        self.bytestream = None
+        if self.mapped_file is not None:
+            self.mapped_file.close()
+            self.mapped_file = None
+
+    def _read(self, count=None):
+        # Mirror file.read(): a count of None reads to the end of the buffer
+        start = self.position
+        if count is None:
+            self.position = len(self.bytestream)
+        else:
+            self.position = min(start + count, len(self.bytestream))
+        return self.bytestream[start:self.position].tobytes()
+
+    def _rw_single(self, typecode, size, value, endianness=None):
+        if endianness is None:
+            endianness = self.context.endianness
+        value = struct.unpack_from(endianness + typecode, self.bytestream, self.position)[0]
+        self.position += size
+        return value
+
+    def _rw_multiple(self, typecode, size, value, shape, endianness=None):
+        if endianness is None:
+            endianness = self.context.endianness
+
+        if not hasattr(shape, "__getitem__"):
+            shape = (shape,)
+        n_to_read = 1
+        for elem in shape:
+            n_to_read *= elem
+
+        if self.context.use_ndarrays:
+            import numpy as np
+            dtype = self._ndarray_dtype(typecode, endianness)
+            # Copy out of the buffer so that the array does not hold the mapped file open
+            data = np.frombuffer(self.bytestream, dtype=dtype, count=n_to_read, offset=self.position).copy()
+            self.position += size * n_to_read
+            return data.reshape(shape)
+
+        if typecode == "e":
+            arr_typecode = "f"
+        else:
+            arr_typecode = typecode
+        data = array.array(arr_typecode,
+                           struct.unpack_from(f"{endianness}{n_to_read}{typecode}", self.bytestream, self.position))
+        self.position += size * n_to_read
+        for subshape in shape[1::][::-1]:
+            data = chunk_list(data, subshape)
+        return data
+
+    def rw_str(self, value, length, encoding='ascii'):
+        return self._read(length).decode(encoding)
+
+    def rw_cstr(self, value, encoding='ascii', end_char=b"\x00"):
+        end = self.find(end_char)
+        out = self._read(end - self.position)
+        self._read(len(end_char))
+        return out.decode(encoding)
+
+    def rw_cstrs(self, value, count, encoding='ascii', end_char=b"\x00"):
+        return [self.rw_cstr(None, encoding, end_char) for _ in range(count)]
+
+    def find(self, substring, blocksize=0x40):
+        """
+        Returns the position of the next occurrence of 'substring' at or after
+        the current position, or the end of the buffer if there is none.
+        The buffer is scanned in small blocks so that short strings never
+        require the remainder of the file to be copied.
+        """
+        size  = len(self.bytestream)
+        start = self.position
+        while start < size:
+            block = self.bytestream[start:start + blocksize + len(substring) - 1].tobytes()
+            idx = block.find(substring)
+            if idx != -1:
+                return start + idx
+            start += blocksize
+        return size
+
+    def rw_bytestring(self, value, count):
+        return self._read(count)
+
+    def rw_unbounded_bytestring(self, value):
+        return self._read()
+
+    def peek_bytestring(self, count):
+        return self.bytestream[self.position:self.position + count].tobytes()
+
+    def rw_layout(self, obj, layout, endianness=None):
+        if endianness is None:
+            endianness = self.context.endianness
+        codec = layout.compile(endianness)
+        layout.assign(obj, codec.unpack_from(self.bytestream, self.position))
+        self.position += codec.size
+        layout.validate(obj, self)
+        return obj
+
+    def assert_at_eof(self):
+        if self.validation == "trusted":
+            return
+        if self.position < len(self.bytestream):
+            raise Exception("Not at end of file!")
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=0):
+        if whence == 0:
+            self.position = offset
+        elif whence == 1:
+            self.position += offset
+        elif whence == 2:
+            self.position = len(self.bytestream) + offset
+        else:
+            raise ValueError(f"Invalid whence ({whence}, should be 0, 1 or 2)")
+
+
+class LazyReader(BufferReader):
+    """
+    A BufferReader that skips over sections marked with 'rw_lazy_obj_method',
+    leaving them to be parsed from the retained buffer when first accessed.
+    Since sections are then no longer read in file order, the reader jumps
+    to the location of each section when asked to check the file pointer
+    against it, rather than validating the position.
+    """
+    __slots__ = ("buffer",)
+
+    def __init__(self, filename, buffer=None, validation="strict"):
+        super().__init__(filename, buffer, validation)
+        self.buffer = buffer
+
+    def __enter__(self):
+        # Read the file into memory rather than mapping it, so that lazily
+        # parsed objects do not keep the file open
+        with open(self.filename, self.open_flags) as F:
+            self.buffer = F.read()
+        self.bytestream = memoryview(self.buffer)
+        self.position   = 0
+        return self
+
+    def rw_lazy_obj_method(self, obj, method, attributes, *args, **kwargs):
+        obj.defer_section(attributes, (self.buffer, self.anchor_pos, self.validation, method.__name__, args, kwargs))
+
+    def assert_file_pointer_now_at(self, msg, location, file_pointer_location=None, use_hex=True):
+        self.seek(location)
+
+    def assert_local_file_pointer_now_at(self, msg, location, file_pointer_location=None, use_hex=True):
+        self.local_seek(location)
+
+    def assert_at_eof(self):
+        pass
+
+
 class Writer(BinaryTargetBase):
     open_flags = "wb"
 
@@ -411,6 +833,13 @@ class Writer(BinaryTargetBase):
         for elem in shape:
             n_to_read *= elem
 
+        if hasattr(value, "dtype"):
+            # numpy arrays are written directly, converting to the target type and endianness if needed
+            if value.size != n_to_read:
+                raise ValueError(f"Expected to write an array of {n_to_read} elements, but it has {value.size}.")
+            self.bytestream.write(value.astype(self._ndarray_dtype(typecode, endianness), copy=False).tobytes())
+            return value
+
         data = value  # Shouldn't need to deepcopy since flatten_list will copy
         for _ in range(len(shape) - 1):
             data = flatten_list(data)
@@ -421,11 +850,25 @@ class Writer(BinaryTargetBase):
         self.bytestream.write(value.encode(encoding))
         return value
 
+    def rw_strs(self, value, length, count, encoding='ascii'):
+        self.rw_bytestrings([v.encode(encoding) for v in value], length, count)
+        return value
+
     def rw_cstr(self, value, encoding='ascii', end_char=b'\x00'):
         out = value.encode(encoding) + end_char
         self.bytestream.write(out)
         return value
 
+    def rw_cstrs(self, value, count, encoding='ascii', end_char=b'\x00'):
+        if len(value) != count:
+            raise ValueError(f"Expected to write {count} strings, but received {len(value)}.")
+        self.bytestream.write(b"".join(v.encode(encoding) + end_char for v in value))
+        return value
+
+    def rw_pointed_strs(self, value, pointers, end_pointer=None, encoding='ascii'):
+        self.bytestream.write(b"".join(v.encode(encoding) for v in value))
+        return value
+
     def rw_bytestring(self, value, count):
         if len(value) != count:
             raise ValueError(f"Expected to write a bytestring of length {count}, but it was length {len(value)}.")
@@ -434,7 +877,9 @@ class Writer(BinaryTargetBase):
 
     def rw_bytestrings(self, value, count, shape):
         for v in value:
-            self.rw_bytestring(v, count)
+            if len(v) != count:
+                raise ValueError(f"Expected to write a bytestring of length {count}, but it was length {len(v)}.")
+        self.bytestream.write(b"".join(value))
         return value
 
     def rw_unbounded_bytestring(self, value):
@@ -485,11 +930,16 @@ class Writer(BinaryTargetBase):
         for elem in shape:
             n_to_read *= elem
 
-        data = value  # Shouldn't need to deepcopy since flatten_list will copy
-        for _ in range(len(shape) - 1):
-            data = flatten_list(data)
-        for d in data:
-            self.rw_s3Quat(d)
+        from .CompressedQuaternions import encode_s3Quats
+
+        data = value
+        if not hasattr(data, "dtype"):
+            for _ in range(len(shape) - 1):
+                data = flatten_list(data)
+        packed_rep, _ = encode_s3Quats(data)
+        if len(packed_rep) != n_to_read:
+            raise ValueError(f"Expected to write {n_to_read} quaternions, but received {len(packed_rep)}.")
+        self.bytestream.write(packed_rep.tobytes())
 
         return value
 
@@ -500,6 +950,16 @@ class Writer(BinaryTargetBase):
         for elem in shape:
             n_to_read *= elem
 
+        if isinstance(value, RecordArray):
+            for i, d in enumerate(value.objects):
+                if d is None:
+                    self.bytestream.write(value.record_bytes(i))
+                else:
+                    if validator is not None:
+                        validator(d)
+                    self.rw_obj(d)
+            return value
+
         data = value  # Shouldn't need to deepcopy since flatten_list will copy
         for _ in range(len(shape) - 1):
             data = flatten_list(data)
@@ -510,6 +970,14 @@ class Writer(BinaryTargetBase):
 
         return value
 
+    def rw_layout(self, obj, layout, endianness=None):
+        if endianness is None:
+            endianness = self.context.endianness
+        codec = layout.compile(endianness)
+        self.bytestream.write(codec.pack(*layout.collect(obj)))
+        layout.validate(obj, self)
+        return obj
+
     def align(self, offset, alignment, padval=b'\x00'):
         n_to_read = (alignment - (offset % alignment)) % alignment
         data = padval * (n_to_read // len(padval))
@@ -572,12 +1040,26 @@ class OffsetTracker(BinaryTargetBase):
         self.adv_offset(length)
         return value
 
+    def rw_strs(self, value, length, count, encoding='ascii'):
+        self.adv_offset(length*count)
+        return value
+
     def rw_cstr(self, value, encoding='ascii', end_char=b'\x00'):
         out = value.encode(encoding) + end_char
         length = len(out)
         self.adv_offset(length)
         return value
 
+    def rw_cstrs(self, value, count, encoding='ascii', end_char=b'\x00'):
+        for v in value:
+            self.rw_cstr(v, encoding, end_char)
+        return value
+
+    def rw_pointed_strs(self, value, pointers, end_pointer=None, encoding='ascii'):
+        for v in value:
+            self.adv_offset(len(v.encode(encoding)))
+        return value
+
     def rw_bytestring(self, value, count):
         self.virtual_offset += count
         return value
@@ -631,6 +1113,14 @@ class OffsetTracker(BinaryTargetBase):
         for elem in shape:
             n_to_read *= elem
 
+        if isinstance(value, RecordArray):
+            for d in value.objects:
+                if d is None:
+                    self.adv_offset(value.records.itemsize)
+                else:
+                    self.rw_obj(d)
+            return value
+
         data = value  # Shouldn't need to deepcopy since flatten_list will copy
         for _ in range(len(shape) - 1):
             data = flatten_list(data)
@@ -638,6 +1128,10 @@ class OffsetTracker(BinaryTargetBase):
             self.rw_obj(d)
 
         return value
+
+    def rw_layout(self, obj, layout, endianness=None):
+        self.adv_offset(layout.size)
+        return obj
         
     def rw_s3Quat(self, value, endianness=None):
         self.adv_offset(6)
@@ -658,11 +1152,69 @@ class OffsetTracker(BinaryTargetBase):
 class PointerCalculator(OffsetTracker):
     open_flags = None
 
-    def tie_to_offset(self, value):
-        return self.tell()
+    def tie_to_offset(self, value, condition=True):
+        return self.tell() if condition else 0
 
-    def tie_to_local_offset(self, value):
-        return self.local_tell()
+    def tie_to_local_offset(self, value, condition=True):
+        return self.local_tell() if condition else 0
 
     def mode(self):
         return "PointerCalculator"
+
+
+class BackpatchingWriter(Writer):
+    """
+    A Writer that lays out and writes a file in a single pass.
+    Offsets that have not been set are tied to the position of the section
+    they point to as it is reached. Blocks that hold those offsets are
+    written through 'rw_deferred_obj_method': a placeholder is emitted and
+    a fixup is recorded, and the block is written over its placeholder
+    when 'apply_fixups' is called once everything else has been written.
+    """
+    __slots__ = ("fixups", "patching")
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.fixups   = []
+        self.patching = False
+
+    def tie_to_offset(self, value, condition=True):
+        if value is not None:
+            return value
+        return self.tell() if condition else 0
+
+    def tie_to_local_offset(self, value, condition=True):
+        if value is not None:
+            return value
+        return self.local_tell() if condition else 0
+
+    def rw_deferred_obj_method(self, obj, method, *args, **kwargs):
+        if self.patching:
+            self.rw_obj_method(obj, method, *args, **kwargs)
+            return
+
+        position = self.tell()
+        sizer = OffsetTracker()
+        sizer.anchor_pos = self.anchor_pos
+        sizer.seek(position)
+        sizer.rw_obj_method(obj, method, *args, **kwargs)
+        size = sizer.tell() - position
+
+        self.fixups.append((position, size, self.anchor_pos, obj, method, args, kwargs))
+        self._handle_pads(size)
+
+    def apply_fixups(self):
+        end_position = self.tell()
+        end_anchor   = self.anchor_pos
+        self.patching = True
+        for position, size, anchor_pos, obj, method, args, kwargs in self.fixups:
+            self.seek(position)
+            self.anchor_pos = anchor_pos
+            self.rw_obj_method(obj, method, *args, **kwargs)
+            if self.tell() != position + size:
+                raise Exception(f"Deferred block at 0x{position:0x} was written with size 0x{self.tell() - position:0x}, "
+                                f"expected 0x{size:0x}.")
+        self.patching   = False
+        self.fixups     = []
+        self.anchor_pos = end_anchor
+        self.seek(end_position)
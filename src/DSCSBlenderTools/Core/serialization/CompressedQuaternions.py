@@ -0,0 +1,101 @@
+import numpy as np
+
+
+class S3QuatWarnings:
+    """
+    Counts of the unusual cases met while converting a batch of s3Quats.
+    """
+    __slots__ = ("leading_bit_set", "invalid_largest_component", "clamped_components")
+
+    def __init__(self):
+        self.leading_bit_set           = 0
+        self.invalid_largest_component = 0
+        self.clamped_components        = 0
+
+    def __bool__(self):
+        return bool(self.leading_bit_set or self.invalid_largest_component or self.clamped_components)
+
+    def report(self):
+        # Clamping on encode has always been silent, so it is only counted
+        if self.leading_bit_set:
+            print(f"WARNING: {self.leading_bit_set} quaternion(s) with a leading bit of 1 found.")
+        if self.invalid_largest_component:
+            print(f"WARNING: {self.invalid_largest_component} quaternion(s) with an invalid largest component found.")
+
+
+def decode_s3Quats(data):
+    """
+    Decodes an (n, 6) block of uint8s, or the equivalent bytestring, into an (n, 4) float64 array of quaternions.
+    Each quaternion is stored as three big-endian uint15s, mapped from the
+    range [-1/sqrt(2), 1/sqrt(2)], followed by the 2-bit index of the
+    dropped largest component, which is always positive.
+    Returns the quaternions and an S3QuatWarnings.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = np.frombuffer(data, dtype=np.uint8)
+    data = np.asarray(data, dtype=np.uint8).reshape(-1, 6).astype(np.int32)
+    warnings = S3QuatWarnings()
+
+    warnings.leading_bit_set = int(np.count_nonzero(data[:, 0] & 0x80))
+    c1 = (data[:, 0] & 0x7F) << 8 | data[:, 1]
+    c2 = (data[:, 2] & 0xFF) << 7 | (data[:, 3] & 0xFE) >> 1
+    c3 = (data[:, 3] & 0x01) << 14 | (data[:, 4] & 0xFF) << 6 | (data[:, 5] & 0xFC) >> 2
+    largest_index = data[:, 5] & 0x03
+
+    components = np.stack([c1, c2, c3], axis=1).astype(np.float64)
+    components = components - 16383
+    components = components / 16384
+    components = components / (2**.5)
+
+    square_vector_length = np.sum(components**2, axis=1)
+    is_valid = square_vector_length <= 1  # Should be smaller than 0.5...
+    warnings.invalid_largest_component = int(np.count_nonzero(~is_valid))
+    largest_component = np.zeros(len(data), dtype=np.float64)
+    largest_component[is_valid] = np.sqrt(1 - square_vector_length[is_valid])
+
+    # Re-insert the largest component at its index, shifting the others along
+    out = np.empty((len(data), 4), dtype=np.float64)
+    rows = np.arange(len(data))
+    slots = np.arange(3)[None, :] + (np.arange(3)[None, :] >= largest_index[:, None])
+    out[rows[:, None], slots] = components
+    out[rows, largest_index] = largest_component
+    return out, warnings
+
+
+def encode_s3Quats(quats):
+    """
+    Encodes an (n, 4) array of quaternions into an (n, 6) uint8 array.
+    The component with the largest magnitude is dropped and the quaternion
+    is multiplied through by its sign, since (X, Y, Z, W) = (-X, -Y, -Z, -W).
+    Returns the packed data and an S3QuatWarnings.
+    """
+    quats = np.asarray(quats, dtype=np.float64).reshape(-1, 4)
+    warnings = S3QuatWarnings()
+
+    abs_components = np.abs(quats)
+    largest_index = np.argmax(abs_components, axis=1)
+    rows = np.arange(len(quats))
+    largest_component_sign = np.where(quats[rows, largest_index] < 0, -1., 1.)
+
+    # Get rid of the largest component
+    keep = np.ones(quats.shape, dtype=bool)
+    keep[rows, largest_index] = False
+    components = quats[keep].reshape(-1, 3) * largest_component_sign[:, None]
+
+    # No other component can be larger than 1/sqrt(2) due to normalisation
+    # So map the remaining components from the interval [-1/sqrt(2), 1/sqrt(2)] to [0, 32767] to gain ~1.4x precision
+    components = np.rint(components * (2**.5) * 16384).astype(np.int64) + 16383
+    out_of_range = (components < 0) | (components > 32767)
+    warnings.clamped_components = int(np.count_nonzero(out_of_range))
+    components = np.clip(components, 0, 32767)
+
+    # Now convert to big-endian uint15s
+    packed_rep = np.empty((len(quats), 6), dtype=np.int64)
+    packed_rep[:, 0] = ((components[:, 0] & 0x7F00) >> 8)
+    packed_rep[:, 1] = ((components[:, 0] & 0x00FF) >> 0)
+    packed_rep[:, 2] = ((components[:, 1] & 0x7F80) >> 7)
+    packed_rep[:, 3] = ((components[:, 1] & 0x007F) << 1) | ((components[:, 2] & 0xC000) >> 14)
+    packed_rep[:, 4] = ((components[:, 2] & 0x3FC0) >> 6)
+    packed_rep[:, 5] = ((components[:, 2] & 0x003F) << 2) | largest_index
+
+    return packed_rep.astype(np.uint8), warnings
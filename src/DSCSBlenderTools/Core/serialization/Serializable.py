@@ -1,7 +1,9 @@
+import array
 import copy
 import io
+import struct
 
-from .BinaryTargets import Reader, Writer, PointerCalculator, Context
+from .BinaryTargets import BufferReader, LazyReader, BackpatchingWriter, PointerCalculator, Context
 
 
 class Serializable:
@@ -20,25 +22,34 @@ class Serializable:
         else:
             self.context = copy.deepcopy(context)
 
-    def read(self, filepath):
-        with Reader(filepath) as rw:
+    def read(self, filepath, lazy=False, validation="strict"):
+        """
+        Reads the object from a file. If 'lazy' is set, sections marked
+        with 'rw_lazy_obj_method' are only parsed on first access.
+        'validation' is one of the Reader validation levels: "strict",
+        "offsets-only", or "trusted".
+        """
+        reader_type = LazyReader if lazy else BufferReader
+        with reader_type(filepath, validation=validation) as rw:
             rw.rw_obj(self)
 
-    def unpack(self, bytestring, *args, **kwargs):
-        rw = Reader(None)
-        rw.bytestream = io.BytesIO()
-        rw.bytestream.write(bytestring)
-        rw.seek(0)
+    def unpack(self, bytestring, *args, lazy=False, validation="strict", **kwargs):
+        if lazy:
+            rw = LazyReader(None, bytes(bytestring), validation)
+        else:
+            rw = BufferReader(None, bytestring, validation)
         rw.rw_obj(self, *args, **kwargs)
 
     def write(self, filepath, *args, **kwargs):
-        with Writer(filepath) as rw:
+        with BackpatchingWriter(filepath) as rw:
             rw.rw_obj(self, *args, **kwargs)
+            rw.apply_fixups()
 
     def pack(self, *args, **kwargs):
-        rw = Writer(None)
+        rw = BackpatchingWriter(None)
         rw.bytestream = io.BytesIO()
         rw.rw_obj(self, *args, **kwargs)
+        rw.apply_fixups()
         rw.bytestream.seek(0)
         return rw.bytestream.read()
 
@@ -49,3 +60,186 @@ class Serializable:
     def read_write(self, rw):
         raise NotImplementedError
 
+    #################
+    # Lazy Sections #
+    #################
+
+    def defer_section(self, attributes, section):
+        """
+        Removes 'attributes' from the object so that the first access to any
+        of them parses 'section' from its retained buffer.
+        Only available on subclasses that have an instance dictionary.
+        """
+        pending = self.__dict__.setdefault("_pending_sections", {})
+        for attr in attributes:
+            self.__dict__.pop(attr, None)
+            pending[attr] = section
+
+    def load_deferred_sections(self):
+        """
+        Parses every section that is still waiting on first access.
+        """
+        pending = getattr(self, "_pending_sections", {})
+        while len(pending):
+            self.__load_deferred_section(next(iter(pending.values())))
+
+    def __load_deferred_section(self, section):
+        pending = self.__dict__["_pending_sections"]
+        # The section is read back into placeholders for its attributes
+        for attr in [attr for attr, s in pending.items() if s is section]:
+            del pending[attr]
+            self.__dict__[attr] = None
+
+        buffer, anchor_pos, validation, method_name, args, kwargs = section
+        rw = LazyReader(None, buffer, validation)
+        rw.anchor_pos = anchor_pos
+        rw.rw_obj_method(self, getattr(self, method_name), *args, **kwargs)
+
+    def __getattr__(self, name):
+        # Only reached when normal attribute lookup fails
+        try:
+            pending = object.__getattribute__(self, "_pending_sections")
+        except AttributeError:
+            pending = {}
+        if name not in pending:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        self.__load_deferred_section(pending[name])
+        return object.__getattribute__(self, name)
+
+
+
+class Field:
+    """
+    A single named entry in a FieldLayout.
+    'count' gives the number of elements for array-valued fields, or the
+    length of the bytestring for fields with the 's' typecode.
+    'expected' is a value the field is asserted to be equal to, e.g. padding
+    or a magic number.
+    'offset' is added to the stored value on read and subtracted on write,
+    matching the behaviour of 'rw_offset_uint32'. It may be given as the name
+    of an attribute of the serialized object.
+    """
+    __slots__ = ("name", "typecode", "count", "expected", "offset")
+
+    def __init__(self, name, typecode, count=1, expected=None, offset=None):
+        self.name     = name
+        self.typecode = typecode
+        self.count    = count
+        self.expected = expected
+        self.offset   = offset
+
+    @property
+    def is_array(self):
+        return self.count != 1 and self.typecode != 's'
+
+    def format(self):
+        if self.count == 1 and self.typecode != 's':
+            return self.typecode
+        return f"{self.count}{self.typecode}"
+
+    def resolve_offset(self, obj):
+        if isinstance(self.offset, str):
+            return getattr(obj, self.offset)
+        return self.offset
+
+
+class FieldLayout:
+    """
+    A declarative description of a fixed-size block of fields, such as a
+    file header. The fields are compiled into a single struct.Struct per
+    endianness, so that the whole block is handled by one pack or unpack
+    call via 'rw.rw_layout(obj, layout)' rather than one call per field.
+    """
+    __slots__ = ("fields", "format", "size", "_compiled")
+
+    def __init__(self, fields):
+        self.fields    = tuple(fields)
+        self.format    = "".join(f.format() for f in self.fields)
+        self.size      = struct.calcsize("<" + self.format)
+        self._compiled = {}
+
+    def compile(self, endianness):
+        codec = self._compiled.get(endianness)
+        if codec is None:
+            codec = struct.Struct(endianness + self.format)
+            self._compiled[endianness] = codec
+        return codec
+
+    def assign(self, obj, values):
+        """
+        Sets the attributes of 'obj' from a flat tuple of unpacked values.
+        """
+        idx = 0
+        for f in self.fields:
+            if f.is_array:
+                value = array.array('f' if f.typecode == 'e' else f.typecode, values[idx:idx + f.count])
+                idx += f.count
+            else:
+                value = values[idx]
+                idx += 1
+                if f.offset is not None:
+                    value += f.resolve_offset(obj)
+            setattr(obj, f.name, value)
+
+    def collect(self, obj):
+        """
+        Gathers the attributes of 'obj' into a flat list of values to pack.
+        """
+        values = []
+        for f in self.fields:
+            value = getattr(obj, f.name)
+            if f.is_array:
+                if len(value) != f.count:
+                    raise ValueError(f"Expected {f.name} to have {f.count} elements, but it has {len(value)}.")
+                values.extend(value)
+            else:
+                if f.offset is not None:
+                    value -= f.resolve_offset(obj)
+                values.append(value)
+        return values
+
+    def validate(self, obj, rw):
+        for f in self.fields:
+            if f.expected is not None:
+                rw.assert_equal(getattr(obj, f.name), f.expected)
+
+    def dtype(self, endianness):
+        """
+        Returns a NumPy structured dtype with one field per Field, laid out
+        identically to the compiled struct. Values are the raw stored values,
+        i.e. without any 'offset' applied.
+        """
+        key = ("dtype", endianness)
+        dtype = self._compiled.get(key)
+        if dtype is None:
+            import numpy as np
+            names   = []
+            formats = []
+            offsets = []
+            offset  = 0
+            for f in self.fields:
+                if f.typecode == 's':
+                    fmt = f"S{f.count}"
+                else:
+                    fmt = endianness + {'l': 'i', 'L': 'I', 'c': 'S1', '?': 'b1'}.get(f.typecode, f.typecode)
+                    if f.is_array:
+                        fmt = (fmt, (f.count,))
+                names.append(f.name)
+                formats.append(fmt)
+                offsets.append(offset)
+                offset += struct.calcsize("<" + f.format())
+            dtype = np.dtype({"names": names, "formats": formats, "offsets": offsets, "itemsize": self.size})
+            self._compiled[key] = dtype
+        return dtype
+
+    def validate_records(self, records, rw):
+        """
+        Checks the 'expected' fields of a structured array of records in bulk.
+        """
+        import numpy as np
+        for f in self.fields:
+            if f.expected is not None:
+                column = records[f.name]
+                mismatches = np.flatnonzero(column != f.expected)
+                if len(mismatches):
+                    rw.assert_equal(column[mismatches[0]], f.expected)
@@ -8,3 +8,13 @@ def flatten_list(lst):
 
 def safe_format(obj, formatter):
     return f"{obj if obj is None else formatter(obj)}"
+
+
+def ndarray_to_list(value):
+    """
+    Converts an ndarray or NumPy scalar, as read in ndarray mode, into the
+    Python values that are read otherwise. Anything else is returned as-is.
+    """
+    if type(value).__module__ == "numpy":
+        return value.tolist()
+    return value
@@ -0,0 +1,40 @@
+import os
+import sys
+import types
+import unittest
+
+# Import the Core package directly so that the tests run without Blender
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if "DSCSBlenderTools" not in sys.modules:
+    package = types.ModuleType("DSCSBlenderTools")
+    package.__path__ = [os.path.join(SRC, "DSCSBlenderTools")]
+    sys.modules["DSCSBlenderTools"] = package
+
+from DSCSBlenderTools.Core.FileFormats.Geom.GeomBinary.MeshBinary.Base import VertexAttributeBinary
+from DSCSBlenderTools.Core.FileFormats.Geom.GeomBinary.MeshBinary.CyberSleuthOpenGL import MeshBinaryDSCSOpenGL
+
+
+def make_mesh(typecode, normalised):
+    mb = MeshBinaryDSCSOpenGL()
+    type_id = next(k for k, v in mb.DATA_TYPES.items() if v == typecode)
+    mb.vertex_attributes = [VertexAttributeBinary(3, normalised, 2, type_id, 0)]
+    mb.bytes_per_vertex  = 4
+    return mb
+
+
+class TestEncodeVertices(unittest.TestCase):
+    def test_integers_are_packed(self):
+        self.assertEqual(make_mesh('H', 0).encode_vertices({3: [[1, 2.]]}, 1), b'\x01\x00\x02\x00')
+
+    def test_normalised_values_are_truncated(self):
+        self.assertEqual(make_mesh('H', 1).encode_vertices({3: [[0.5, 1.]]}, 1), b'\xff\x7f\xff\xff')
+
+    def test_unpackable_integers_are_rejected(self):
+        for normalised, values in [(0, [1.5, 2.]), (0, [float('nan'), 2.]), (1, [float('nan'), 1.]), (0, [70000, 2])]:
+            with self.subTest(normalised=normalised, values=values):
+                with self.assertRaises(ValueError):
+                    make_mesh('H', normalised).encode_vertices({3: [values]}, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
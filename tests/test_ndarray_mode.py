@@ -0,0 +1,149 @@
+import os
+import sys
+import types
+import unittest
+
+# Import the Core package directly so that the tests run without Blender
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if "DSCSBlenderTools" not in sys.modules:
+    package = types.ModuleType("DSCSBlenderTools")
+    package.__path__ = [os.path.join(SRC, "DSCSBlenderTools")]
+    sys.modules["DSCSBlenderTools"] = package
+
+import numpy as np
+
+from DSCSBlenderTools.Core.FileFormats.Anim.AnimBinary import AnimBinary
+from DSCSBlenderTools.Core.FileFormats.Anim.AnimInterface import AnimInterface
+from DSCSBlenderTools.Core.FileFormats.Geom.GeomBinary import GeomBinaryDSCSOpenGL
+from DSCSBlenderTools.Core.FileFormats.Geom.GeomBinary.MeshBinary.Base import Vertex
+from DSCSBlenderTools.Core.FileFormats.Geom.GeomBinary.MeshBinary.VertexBuffer import VertexBuffer
+from DSCSBlenderTools.Core.FileFormats.Geom.GeomInterface import GeomInterface
+from DSCSBlenderTools.Core.FileFormats.Phys.PhysBinary import PhysBinary
+from DSCSBlenderTools.Core.FileFormats.Phys.PhysInterface import PhysInterface
+from DSCSBlenderTools.Core.FileFormats.Skel.SkelBinary import SkelBinary
+from DSCSBlenderTools.Core.FileFormats.Skel.SkelInterface import SkelInterface
+from DSCSBlenderTools.Core.serialization.Serializable import Serializable
+
+
+BONE_COUNT = 6
+
+
+def make_skel():
+    si = SkelInterface()
+    for i in range(BONE_COUNT):
+        si.add_bone(0x100 + i, i - 1, i % 2, [float(i), 0., 0., 1.], [0., 0., 0., 1.], [1., 1., 1., 1.])
+    si.add_float_channel(0x999, 0x10, 3)
+    return si
+
+
+def make_anim():
+    ai = AnimInterface()
+    ai.playback_rate = 24
+    ai.bone_count    = BONE_COUNT
+    for b in range(BONE_COUNT):
+        ai.rotations[b] = {f: [0., 0., (f % 3)/3, 1.] for f in range(0, 10, 1 + b % 3)}
+        ai.locations[b] = {f: [float(b), f/10, 0.] for f in range(0, 10, 1 + b % 2)}
+        ai.scales[b]    = {0: [1., 1., 1.]}
+    ai.float_channels[0] = {0: 1., 5: 2.}
+    return ai
+
+
+def make_phys():
+    pi = PhysInterface()
+    pi.materials = [b"mat0"]
+    pi.bones     = [b"bone0"]
+    pi.add_box_collider(1., 2., 3., b"mat0")
+    pi.add_complex_collider([[0., 0., 0.], [1., 0., 0.], [0., 1., 0.]], [(0, 1, 2, 0, 0)], [b"mat0"], [b"bone0"])
+    for collider in pi.colliders:
+        collider.add_instance("ragdoll", [0., 1., 2.], [0., 0., 0., 1.], 1.)
+    return pi
+
+
+def make_geom():
+    gi = GeomInterface()
+    vertices = []
+    for i in range(8):
+        v = Vertex()
+        v.position = [float(i), float(i % 2), float(i % 3)]
+        v.normal   = [0., 0., 1.]
+        v.UV1      = [i/8, 0.5]
+        v.indices  = [i % BONE_COUNT]
+        v.weights  = [1.]
+        vertices.append(v)
+    gi.add_mesh(0x1000, 1, 0, vertices, [(0, 1, 2), (2, 3, 4), (4, 5, 6), (5, 6, 7)])
+    material = gi.add_material(0x2000, 2, [1, 2, 3, 4])
+    material.add_shader_uniform(0x33, [0.5, 0.25, 0.125])
+    material.add_opengl_setting(0xA1, [1, 0, 0, 0])
+    gi.textures = ["texture"]
+    gi.ibpms    = [[float(i*12 + j) for j in range(12)] for i in range(BONE_COUNT)]
+    return gi
+
+
+def read(binary, data, use_ndarrays):
+    binary.context.use_ndarrays = use_ndarrays
+    binary.unpack(data)
+    return binary
+
+
+class TestNdarrayMode(unittest.TestCase):
+    """
+    Files read with ndarrays should build the same interfaces as files read
+    with lists, and should write back out to the same bytes.
+    """
+
+    def assertNoNumpyValues(self, obj, path="interface"):
+        if isinstance(obj, (np.ndarray, np.generic)):
+            self.fail(f"{path} is a NumPy value of type '{type(obj).__name__}'")
+        elif isinstance(obj, (Serializable, VertexBuffer)):
+            # Binaries and vertex buffers held by interfaces are allowed to keep their arrays
+            return
+        elif isinstance(obj, dict):
+            for key, value in obj.items():
+                self.assertNoNumpyValues(key,   f"{path} key")
+                self.assertNoNumpyValues(value, f"{path}[{key!r}]")
+        elif isinstance(obj, (list, tuple)):
+            for i, value in enumerate(obj):
+                self.assertNoNumpyValues(value, f"{path}[{i}]")
+        elif hasattr(obj, "__dict__"):
+            for key, value in vars(obj).items():
+                self.assertNoNumpyValues(value, f"{path}.{key}")
+
+    def test_skel(self):
+        data = make_skel().to_binary().pack()
+        for use_ndarrays in (False, True):
+            with self.subTest(use_ndarrays=use_ndarrays):
+                si = SkelInterface.from_binary(read(SkelBinary(), data, use_ndarrays))
+                self.assertNoNumpyValues(si)
+                self.assertEqual([b.flag for b in si.bones], [i % 2 for i in range(BONE_COUNT)])
+                self.assertEqual(si.to_binary().pack(), data)
+
+    def test_anim(self):
+        sb   = make_skel().to_binary()
+        data = make_anim().to_binary(sb, isBase=False).pack()
+        for use_ndarrays in (False, True):
+            with self.subTest(use_ndarrays=use_ndarrays):
+                ai = AnimInterface.from_binary(read(AnimBinary(sb), data, use_ndarrays))
+                self.assertNoNumpyValues(ai)
+                self.assertEqual(ai.to_binary(sb, isBase=False).pack(), data)
+
+    def test_phys(self):
+        data = make_phys().to_binary().pack()
+        for use_ndarrays in (False, True):
+            with self.subTest(use_ndarrays=use_ndarrays):
+                pi = PhysInterface.from_binary(read(PhysBinary(), data, use_ndarrays))
+                self.assertNoNumpyValues(pi)
+                self.assertEqual(pi.to_binary().pack(), data)
+
+    def test_geom(self):
+        data = make_geom().to_binary("DSCS_OpenGL").pack()
+        list_gi = GeomInterface.from_binary(read(GeomBinaryDSCSOpenGL(), data, False))
+        nd_gi   = GeomInterface.from_binary(read(GeomBinaryDSCSOpenGL(), data, True))
+        self.assertNoNumpyValues(nd_gi)
+        self.assertEqual(list(nd_gi.meshes[0].indices.buffer), list(list_gi.meshes[0].indices.buffer))
+        self.assertEqual(list(nd_gi.materials[0].shader_file), list(list_gi.materials[0].shader_file))
+        self.assertEqual(nd_gi.ibpms, [list(ibpm) for ibpm in list_gi.ibpms])
+        self.assertEqual(nd_gi.to_binary("DSCS_OpenGL").pack(), list_gi.to_binary("DSCS_OpenGL").pack())
+
+
+if __name__ == "__main__":
+    unittest.main()